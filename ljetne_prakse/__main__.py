@@ -0,0 +1,5 @@
+import sys
+
+from ljetne_prakse.cli import main
+
+sys.exit(main())
@@ -0,0 +1,514 @@
+from datetime import date
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import regex
+import unidecode
+
+# Dates are stored as days since 1970-01-01, missing values get a sentinel
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MISSING_DAY = np.iinfo(np.int32).min
+MISSING_CODE = -1
+MISSING_N_SPOTS = -1
+
+PAID, UNPAID, UNKNOWN_PAY = 1, 0, -1
+
+INTEGER_PATTERN = r"\d+"
+UNPAID_PATTERN = (
+    r"^(ne|nema|no|nije predvideno|trenutno ne)\b|\bne (honorira|placa)|neplacen|"
+    r"bez (naknade|honorara)|unpaid"
+)
+PAID_PATTERN = (
+    r"^(da|yes)\b|\d+\s*(kn|eur|€|hrk)|placen|placa|platit|honorira|honorar|"
+    r"satnic|odradenim satima|hourly|ugovor|paid"
+)
+# Meals and travel paid for by the company aren't pay for the internship
+BENEFIT_PATTERN = (
+    r"(placen[aio]?|pokriven[aio]?|osiguran[aio]?|besplatn\w*)\s+"
+    r"(topli obrok|rucak|troskovi (prijevoza|rucka))"
+)
+
+INTEGER_REGEX = regex.compile(INTEGER_PATTERN)
+UNPAID_REGEX = regex.compile(UNPAID_PATTERN)
+PAID_REGEX = regex.compile(PAID_PATTERN)
+BENEFIT_REGEX = regex.compile(BENEFIT_PATTERN)
+
+COLUMN_NAMES = (
+    "snapshot",
+    "company",
+    "n_spots",
+    "planned_start",
+    "planned_end",
+    "compensation",
+    "location",
+)
+DICTIONARY_NAMES = ("snapshot", "company", "compensation", "location")
+
+
+# region Encoding
+class Dictionary:
+    def __init__(self, values: Optional[Iterable[str]] = None):
+        self.values: List[str] = list()
+        self.codes: Dict[str, int] = dict()
+
+        for value in values or list():
+            self.add(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value: str) -> int:
+        code = self.codes.get(value)
+
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+
+        return code
+
+    def encode(self, values: Iterable[Optional[str]]) -> np.ndarray:
+        return np.fromiter(
+            (MISSING_CODE if value is None else self.add(value) for value in values),
+            dtype=np.int32,
+        )
+
+    def decode(self, codes: Iterable[int]) -> List[Optional[str]]:
+        return [None if code < 0 else self.values[code] for code in codes]
+
+
+def date_to_day(value: Optional[Sequence[int]]) -> int:
+    if value is None:
+        return MISSING_DAY
+
+    try:
+        year, month, day = value
+        return date(year, month, day).toordinal() - EPOCH_ORDINAL
+    except (TypeError, ValueError):
+        return MISSING_DAY
+
+
+def day_to_date(day: int) -> Optional[date]:
+    if day == MISSING_DAY:
+        return None
+
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+
+def parse_n_spots(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+
+    match = None if value is None else INTEGER_REGEX.search(str(value))
+
+    return MISSING_N_SPOTS if match is None else int(match.group())
+
+
+def classify_compensation(text: Optional[str]) -> int:
+    if text is None:
+        return UNKNOWN_PAY
+
+    text = unidecode.unidecode(text).strip().lower()
+
+    if UNPAID_REGEX.search(text):
+        return UNPAID
+
+    if PAID_REGEX.search(BENEFIT_REGEX.sub(" ", text)):
+        return PAID
+
+    return UNKNOWN_PAY
+
+
+# endregion
+
+
+# region Group by
+def group_count(
+    keys: np.ndarray, n_groups: int, mask: Optional[np.ndarray] = None
+) -> np.ndarray:
+    valid = keys >= 0 if mask is None else (keys >= 0) & mask
+
+    return np.bincount(keys[valid], minlength=n_groups)
+
+
+def group_sum(
+    keys: np.ndarray,
+    values: np.ndarray,
+    n_groups: int,
+    mask: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    valid = keys >= 0 if mask is None else (keys >= 0) & mask
+
+    return np.bincount(keys[valid], weights=values[valid], minlength=n_groups)
+
+
+def group_mean(
+    keys: np.ndarray,
+    values: np.ndarray,
+    n_groups: int,
+    mask: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    counts = group_count(keys=keys, n_groups=n_groups, mask=mask)
+    sums = group_sum(keys=keys, values=values, n_groups=n_groups, mask=mask)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts != 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def combine_keys(
+    keys: np.ndarray, other_keys: np.ndarray, n_other_groups: int
+) -> np.ndarray:
+    # Two group keys become one, so group_* work on pairs of them as well
+    combined = keys.astype(np.int64) * n_other_groups + other_keys
+
+    return np.where((keys >= 0) & (other_keys >= 0), combined, MISSING_CODE)
+
+
+def count_values(values: np.ndarray, missing: int) -> Dict[int, int]:
+    unique, counts = np.unique(values[values != missing], return_counts=True)
+
+    return {int(value): int(count) for value, count in zip(unique, counts)}
+
+
+# endregion
+
+
+# region Columns
+def get_durations(planned_start: np.ndarray, planned_end: np.ndarray) -> np.ndarray:
+    valid = (
+        (planned_start != MISSING_DAY)
+        & (planned_end != MISSING_DAY)
+        & (planned_end >= planned_start)
+    )
+
+    return np.where(valid, planned_end - planned_start, MISSING_DAY)
+
+
+class PositionColumns:
+    def __init__(self):
+        self.dictionaries = {name: Dictionary() for name in DICTIONARY_NAMES}
+        # Snapshots are appended as chunks and only concatenated when a whole
+        # column is read, so adding many snapshots doesn't copy the rows each time
+        self.chunks: Dict[str, List[np.ndarray]] = {
+            name: list() for name in COLUMN_NAMES
+        }
+        self.n_rows = 0
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        chunks = self.chunks[name]
+
+        if len(chunks) != 1:
+            column = (
+                np.concatenate(chunks) if len(chunks) != 0 else np.empty(0, np.int32)
+            )
+            self.chunks[name] = chunks = [column]
+
+        return chunks[0]
+
+    def get_snapshot_names(self) -> List[str]:
+        return list(self.dictionaries["snapshot"].values)
+
+    def append_snapshot(
+        self,
+        snapshot_name: str,
+        regrouped_results: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    ) -> Dict[str, np.ndarray]:
+        snapshot_code = self.dictionaries["snapshot"].add(snapshot_name)
+        companies, records = list(), list()
+
+        for company_name, results in regrouped_results:
+            for result in results:
+                companies.append(company_name)
+                records.append(result)
+
+        new_columns = {
+            "snapshot": np.full(len(records), snapshot_code, dtype=np.int32),
+            "company": self.dictionaries["company"].encode(companies),
+            "n_spots": np.fromiter(
+                (parse_n_spots(record.get("n_spots")) for record in records),
+                dtype=np.int32,
+                count=len(records),
+            ),
+            "compensation": self.dictionaries["compensation"].encode(
+                record.get("compensation") for record in records
+            ),
+            "location": self.dictionaries["location"].encode(
+                record.get("location") for record in records
+            ),
+        }
+
+        for name in ("planned_start", "planned_end"):
+            new_columns[name] = np.fromiter(
+                (date_to_day(record.get(name)) for record in records),
+                dtype=np.int32,
+                count=len(records),
+            )
+
+        for name in COLUMN_NAMES:
+            self.chunks[name].append(new_columns[name])
+
+        self.n_rows += len(records)
+
+        return new_columns
+
+    def remove_snapshot(self, snapshot_name: str):
+        snapshot_code = self.dictionaries["snapshot"].codes.get(snapshot_name)
+
+        if snapshot_code is None:
+            return
+
+        keep = self["snapshot"] != snapshot_code
+
+        for name in COLUMN_NAMES:
+            self.chunks[name] = [self[name][keep]]
+
+        self.n_rows = int(np.count_nonzero(keep))
+
+    def get_pay(self, compensation: np.ndarray) -> np.ndarray:
+        # Classified once per distinct compensation text, then looked up
+        table = np.array(
+            [
+                classify_compensation(text)
+                for text in self.dictionaries["compensation"].values
+            ]
+            + [UNKNOWN_PAY],
+            dtype=np.int8,
+        )
+
+        return table[compensation]
+
+    def save(self, path: Path):
+        dictionaries = json.dumps(
+            {name: dictionary.values for name, dictionary in self.dictionaries.items()},
+            ensure_ascii=False,
+        )
+        columns = {name: self[name] for name in COLUMN_NAMES}
+
+        with open(path, mode="wb") as f:
+            np.savez_compressed(f, **columns, dictionaries=np.array(dictionaries))
+
+    @classmethod
+    def load(cls, path: Path) -> "PositionColumns":
+        columns = cls()
+
+        with np.load(path, allow_pickle=False) as data:
+            dictionaries = json.loads(str(data["dictionaries"]))
+
+            for name in COLUMN_NAMES:
+                columns.chunks[name] = [data[name].astype(np.int32)]
+
+        columns.n_rows = len(columns.chunks["snapshot"][0])
+
+        for name, values in dictionaries.items():
+            columns.dictionaries[name] = Dictionary(values=values)
+
+        return columns
+
+
+# endregion
+
+
+# region Aggregation
+def aggregate_columns(
+    columns: PositionColumns, snapshot_columns: Dict[str, np.ndarray]
+) -> Dict[str, Any]:
+    company = snapshot_columns["company"]
+    n_spots = snapshot_columns["n_spots"]
+    has_spots = n_spots >= 0
+    n_companies = len(columns.dictionaries["company"])
+
+    spots_by_company = group_sum(
+        keys=company, values=n_spots, n_groups=n_companies, mask=has_spots
+    )
+    positions_by_company = group_count(keys=company, n_groups=n_companies)
+    company_codes = np.flatnonzero(positions_by_company)
+
+    months = dict()
+
+    for name in ("planned_start", "planned_end"):
+        days = snapshot_columns[name]
+        valid = days != MISSING_DAY
+        month_keys = (
+            days[valid].astype("datetime64[D]").astype("datetime64[M]")
+        ).astype(np.int64)
+        months[name] = count_values(values=month_keys, missing=MISSING_CODE)
+
+    durations = get_durations(
+        planned_start=snapshot_columns["planned_start"],
+        planned_end=snapshot_columns["planned_end"],
+    )
+    durations = durations[durations != MISSING_DAY]
+    pay = columns.get_pay(compensation=snapshot_columns["compensation"])
+
+    return {
+        "n_positions": int(len(company)),
+        "n_spots": int(n_spots[has_spots].sum()),
+        "companies": [int(code) for code in company_codes],
+        "spots_by_company": [int(spots_by_company[code]) for code in company_codes],
+        "positions_by_company": [
+            int(positions_by_company[code]) for code in company_codes
+        ],
+        "start_months": months["planned_start"],
+        "end_months": months["planned_end"],
+        "duration_weeks": count_values(values=durations // 7, missing=MISSING_CODE),
+        "n_durations": int(len(durations)),
+        "duration_days_sum": int(durations.sum()),
+        "n_paid": int(np.count_nonzero(pay == PAID)),
+        "n_unpaid": int(np.count_nonzero(pay == UNPAID)),
+        "n_unknown_pay": int(np.count_nonzero(pay == UNKNOWN_PAY)),
+    }
+
+
+class SnapshotAnalytics:
+    # Every snapshot is aggregated once, when it's added. Summaries over many
+    # snapshots only combine those aggregates and never go back to the rows
+    def __init__(
+        self,
+        columns: Optional[PositionColumns] = None,
+        aggregates: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.columns = PositionColumns() if columns is None else columns
+        self.aggregates = dict() if aggregates is None else aggregates
+
+    def __contains__(self, snapshot_name: str) -> bool:
+        return snapshot_name in self.aggregates
+
+    def is_current(self, snapshot_name: str, source: str) -> bool:
+        aggregate = self.aggregates.get(snapshot_name)
+
+        return aggregate is not None and aggregate["source"] == source
+
+    def add_snapshot(
+        self,
+        snapshot_name: str,
+        regrouped_results: Iterable[Tuple[str, List[Dict[str, Any]]]],
+        source: str,
+    ):
+        # A snapshot analyzed again replaces the rows and aggregate it had
+        if snapshot_name in self.aggregates:
+            self.columns.remove_snapshot(snapshot_name=snapshot_name)
+
+        snapshot_columns = self.columns.append_snapshot(
+            snapshot_name=snapshot_name, regrouped_results=regrouped_results
+        )
+        self.aggregates[snapshot_name] = {
+            **aggregate_columns(
+                columns=self.columns, snapshot_columns=snapshot_columns
+            ),
+            "source": source,
+        }
+
+    def summarize(self, snapshot_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        if snapshot_names is None:
+            snapshot_names = list(self.aggregates)
+
+        n_companies = len(self.columns.dictionaries["company"])
+        spots_by_company = np.zeros(n_companies, dtype=np.int64)
+        positions_by_company = np.zeros(n_companies, dtype=np.int64)
+        counters = {
+            "start_months": dict(),
+            "end_months": dict(),
+            "duration_weeks": dict(),
+        }
+        totals = dict.fromkeys(
+            (
+                "n_positions",
+                "n_spots",
+                "n_durations",
+                "duration_days_sum",
+                "n_paid",
+                "n_unpaid",
+                "n_unknown_pay",
+            ),
+            0,
+        )
+
+        for snapshot_name in snapshot_names:
+            aggregate = self.aggregates[snapshot_name]
+            codes = np.array(aggregate["companies"], dtype=np.int64)
+
+            np.add.at(spots_by_company, codes, aggregate["spots_by_company"])
+            np.add.at(positions_by_company, codes, aggregate["positions_by_company"])
+
+            for key in totals:
+                totals[key] += aggregate[key]
+
+            for key, counter in counters.items():
+                for value, count in aggregate[key].items():
+                    counter[int(value)] = counter.get(int(value), 0) + count
+
+        companies = self.columns.dictionaries["company"].values
+        order = np.argsort(-spots_by_company, kind="stable")
+
+        return {
+            "snapshots": list(snapshot_names),
+            "n_positions": totals["n_positions"],
+            "n_spots": totals["n_spots"],
+            "spots_by_company": {
+                companies[code]: int(spots_by_company[code])
+                for code in order
+                if positions_by_company[code] != 0
+            },
+            "positions_by_company": {
+                companies[code]: int(positions_by_company[code])
+                for code in order
+                if positions_by_company[code] != 0
+            },
+            "planned_start_by_month": format_months(counters["start_months"]),
+            "planned_end_by_month": format_months(counters["end_months"]),
+            "duration_by_weeks": dict(sorted(counters["duration_weeks"].items())),
+            "mean_duration_days": (
+                totals["duration_days_sum"] / totals["n_durations"]
+                if totals["n_durations"] != 0
+                else None
+            ),
+            "paid": {
+                "paid": totals["n_paid"],
+                "unpaid": totals["n_unpaid"],
+                "unknown": totals["n_unknown_pay"],
+                "paid_share": (
+                    totals["n_paid"] / (totals["n_paid"] + totals["n_unpaid"])
+                    if totals["n_paid"] + totals["n_unpaid"] != 0
+                    else None
+                ),
+            },
+        }
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.columns.save(path=path)
+
+        with open(path.with_suffix(".json"), mode="w+", encoding="utf8") as f:
+            json.dump(self.aggregates, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "SnapshotAnalytics":
+        path = Path(path)
+
+        with open(path.with_suffix(".json"), encoding="utf8") as f:
+            aggregates = json.load(f)
+
+        # JSON turns the month and week keys into strings
+        for aggregate in aggregates.values():
+            for key in ("start_months", "end_months", "duration_weeks"):
+                aggregate[key] = {int(k): v for k, v in aggregate[key].items()}
+
+        return cls(columns=PositionColumns.load(path=path), aggregates=aggregates)
+
+
+def format_months(counter: Dict[int, int]) -> Dict[str, int]:
+    # Month keys count months since 1970-01
+    return {
+        f"{1970 + month // 12:04d}-{month % 12 + 1:02d}": count
+        for month, count in sorted(counter.items())
+    }
+
+
+# endregion
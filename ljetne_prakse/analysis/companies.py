@@ -0,0 +1,306 @@
+from difflib import SequenceMatcher
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import regex
+import unidecode
+
+# Resolves company names seen across snapshots to stable integer IDs. Names are
+# only ever scored against companies sharing a blocking key (the website host, a
+# name token or a name prefix), so the work grows with the size of the blocks and
+# not with the square of the number of companies seen
+REGISTRY_VERSION = 1
+
+COMPANY_TEXT_SUFFIX_PATTERN = r"\[[^\]]*\]\s*$"
+LEGAL_FORM_PATTERN = (
+    r"\b(j\.?\s?d\.?\s?o\.?\s?o|d\.?\s?o\.?\s?o|d\.\s?d|gmbh|ltd|llc|inc|"
+    r"s\.\s?p\.\s?a|obrt)\b\.?"
+)
+NON_WORD_PATTERN = r"[^a-z0-9]+"
+
+COMPANY_TEXT_SUFFIX_REGEX = regex.compile(COMPANY_TEXT_SUFFIX_PATTERN)
+LEGAL_FORM_REGEX = regex.compile(LEGAL_FORM_PATTERN)
+NON_WORD_REGEX = regex.compile(NON_WORD_PATTERN)
+
+# Hosts many unrelated companies link to say nothing about identity
+GENERIC_HOSTS = frozenset(
+    (
+        "facebook.com",
+        "fer.hr",
+        "fer.unizg.hr",
+        "google.com",
+        "instagram.com",
+        "linkedin.com",
+        "hr.linkedin.com",
+    )
+)
+
+MIN_TOKEN_LENGTH = 3
+PREFIX_LENGTH = 4
+HOST_MATCH_BOOST = 0.1
+HOST_MISMATCH_PENALTY = 0.9
+
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_MAX_BLOCK_SIZE = 64
+
+
+# region Normalization
+
+
+def get_name_tokens(name: str) -> Tuple[str, ...]:
+    text = COMPANY_TEXT_SUFFIX_REGEX.sub("", str(name))
+    text = unidecode.unidecode(text).lower()
+    text = LEGAL_FORM_REGEX.sub(" ", text)
+
+    return tuple(token for token in NON_WORD_REGEX.split(text) if token)
+
+
+def normalize_company_name(name: str) -> str:
+    return " ".join(get_name_tokens(name=name))
+
+
+def get_url_host(url: Optional[str]) -> Optional[str]:
+    if url is None:
+        return None
+
+    url = str(url).strip().lower()
+
+    if len(url) == 0:
+        return None
+
+    if "://" not in url:
+        url = f"http://{url}"
+
+    try:
+        host = urlparse(url).hostname
+    except ValueError:
+        return None
+
+    if host is None or "." not in host:
+        return None
+
+    if host.startswith("www."):
+        host = host[4:]
+
+    return None if host in GENERIC_HOSTS else host
+
+
+def get_blocking_keys(tokens: Tuple[str, ...], host: Optional[str]) -> List[str]:
+    keys = list()
+
+    if host is not None:
+        keys.append(f"host:{host}")
+
+    if len(tokens) != 0:
+        keys.append(f"name:{' '.join(tokens)}")
+        keys.append(f"prefix:{''.join(tokens)[:PREFIX_LENGTH]}")
+
+    for token in tokens:
+        if len(token) >= MIN_TOKEN_LENGTH:
+            keys.append(f"token:{token}")
+
+    return list(dict.fromkeys(keys))
+
+
+def get_name_similarity(first: str, second: str) -> float:
+    first_tokens, second_tokens = set(first.split()), set(second.split())
+    union = first_tokens | second_tokens
+
+    jaccard = len(first_tokens & second_tokens) / len(union) if union else 0.0
+
+    return max(jaccard, SequenceMatcher(None, first, second).ratio())
+
+
+# endregion
+
+# region Resolution
+
+
+class CompanyIdentity:
+    __slots__ = ("id", "names", "normalized_names", "hosts")
+
+    def __init__(
+        self,
+        company_id: int,
+        names: Iterable[str] = (),
+        hosts: Iterable[str] = (),
+    ):
+        self.id = company_id
+        self.names = list()
+        self.normalized_names = set()
+        self.hosts = set(hosts)
+
+        for name in names:
+            self.add_name(name=name)
+
+    def add_name(self, name: str):
+        if name not in self.names:
+            self.names.append(name)
+            self.normalized_names.add(normalize_company_name(name=name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "names": self.names, "hosts": sorted(self.hosts)}
+
+
+class CompanyResolver:
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_block_size: int = DEFAULT_MAX_BLOCK_SIZE,
+    ):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+
+        self.identities: List[CompanyIdentity] = list()
+        self.ids_by_name: Dict[str, int] = dict()
+        self.blocks: Dict[str, Set[int]] = dict()
+
+        self.n_compared = 0
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    def _index(self, identity: CompanyIdentity, name: str, host: Optional[str]):
+        self.ids_by_name[name] = identity.id
+
+        for key in get_blocking_keys(tokens=get_name_tokens(name=name), host=host):
+            self.blocks.setdefault(key, set()).add(identity.id)
+
+    def _add(self, identity: CompanyIdentity, name: str, host: Optional[str]):
+        identity.add_name(name=name)
+
+        if host is not None:
+            identity.hosts.add(host)
+
+        self._index(identity=identity, name=name, host=host)
+
+    def get_candidates(self, tokens: Tuple[str, ...], host: Optional[str]) -> Set[int]:
+        candidates = set()
+
+        for key in get_blocking_keys(tokens=tokens, host=host):
+            block = self.blocks.get(key)
+
+            # Huge blocks come from common words, they would bring back the
+            # quadratic comparisons blocking is there to avoid
+            if block is not None and len(block) <= self.max_block_size:
+                candidates.update(block)
+
+        return candidates
+
+    def score(
+        self, identity: CompanyIdentity, normalized_name: str, host: Optional[str]
+    ) -> float:
+        score = max(
+            get_name_similarity(normalized_name, other)
+            for other in identity.normalized_names
+        )
+
+        # Subsidiaries often share their parent's website, so a shared host only
+        # nudges the score and the names still have to be alike
+        if host is not None and host in identity.hosts:
+            score = min(1.0, score + HOST_MATCH_BOOST)
+        elif host is not None and len(identity.hosts) != 0:
+            score *= HOST_MISMATCH_PENALTY
+
+        return score
+
+    def resolve(self, name: str, url: Optional[str] = None) -> int:
+        host = get_url_host(url=url)
+        company_id = self.ids_by_name.get(name)
+
+        if company_id is not None:
+            identity = self.identities[company_id]
+
+            if host is not None and host not in identity.hosts:
+                self._add(identity=identity, name=name, host=host)
+
+            return company_id
+
+        tokens = get_name_tokens(name=name)
+        normalized_name = " ".join(tokens)
+
+        best_identity, best_score = None, 0.0
+
+        # Lower IDs win ties, so an established identity keeps its place
+        for candidate_id in sorted(self.get_candidates(tokens=tokens, host=host)):
+            identity = self.identities[candidate_id]
+            score = self.score(
+                identity=identity, normalized_name=normalized_name, host=host
+            )
+            self.n_compared += 1
+
+            if score > best_score:
+                best_identity, best_score = identity, score
+
+        if best_identity is None or best_score < self.threshold:
+            best_identity = CompanyIdentity(company_id=len(self.identities))
+            self.identities.append(best_identity)
+
+        self._add(identity=best_identity, name=name, host=host)
+
+        return best_identity.id
+
+    def resolve_snapshot(
+        self, regrouped_results: Iterable[Tuple[str, List[Dict[str, Any]]]]
+    ) -> Dict[str, int]:
+        ids = dict()
+
+        for company_name, results in regrouped_results:
+            url = next(
+                (r.get("company_url") for r in results if r.get("company_url")), None
+            )
+            ids[company_name] = self.resolve(name=company_name, url=url)
+
+        return ids
+
+    def get_names(self, company_id: int) -> List[str]:
+        return list(self.identities[company_id].names)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": REGISTRY_VERSION,
+            "companies": [identity.to_dict() for identity in self.identities],
+        }
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(path, mode="w+", encoding="utf8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> "CompanyResolver":
+        with open(path, encoding="utf8") as f:
+            registry = json.load(f)
+
+        if registry.get("version") != REGISTRY_VERSION:
+            raise RuntimeError(
+                f"Unsupported company registry version {registry.get('version')} in "
+                f"{path}"
+            )
+
+        resolver = cls(**kwargs)
+
+        for i, company in enumerate(registry["companies"]):
+            if company["id"] != i:
+                raise RuntimeError(f"Company IDs in {path} aren't contiguous")
+
+            identity = CompanyIdentity(company_id=i, hosts=company["hosts"])
+            resolver.identities.append(identity)
+
+            # Hosts are indexed on their own, the registry doesn't keep which
+            # name came with which host
+            for name in company["names"]:
+                identity.add_name(name=name)
+                resolver._index(identity=identity, name=name, host=None)
+
+            for host in identity.hosts:
+                resolver.blocks.setdefault(f"host:{host}", set()).add(i)
+
+        return resolver
+
+
+# endregion
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import regex
+
+from ljetne_prakse.storage.snapshot import load_results
+
+WHITESPACE_PATTERN = r"\s+"
+
+WHITESPACE_REGEX = regex.compile(WHITESPACE_PATTERN)
+
+
+def get_results_path(path: Path) -> Path:
+    path = Path(path)
+
+    if os.path.isfile(path):
+        return path
+
+    for candidate in (
+        path / "analysis" / "results.json",
+        path / "analysis" / "results.snapshot",
+        path / "results.json",
+        path / "results.snapshot",
+    ):
+        if os.path.isfile(candidate):
+            return candidate
+
+    raise RuntimeError(f"Couldn't find results.json in {path}")
+
+
+def get_snapshot_name(results_path: Path) -> str:
+    # exports/<snapshot>/analysis/results.json or <snapshot>/results.json
+    if results_path.parent.name == "analysis":
+        return results_path.parent.parent.name
+
+    return results_path.parent.name
+
+
+def load_records(path: Path) -> List[Dict[str, Any]]:
+    regrouped_results = load_results(path=get_results_path(path=path))
+
+    return [
+        {"company_name": company_name, **result}
+        for company_name, results in regrouped_results.items()
+        for result in results
+    ]
+
+
+def get_fingerprint(record: Dict[str, Any]) -> str:
+    text = json.dumps(record, ensure_ascii=False, sort_keys=True)
+
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+
+def get_identity(record: Dict[str, Any]) -> Tuple[str, str]:
+    # Records describing the same position share a company and a title, every
+    # other field is allowed to change between snapshots
+    company_name = WHITESPACE_REGEX.sub(" ", str(record.get("company_name"))).strip()
+    title = WHITESPACE_REGEX.sub(" ", str(record.get("position_title"))).strip()
+
+    return company_name.lower(), title.lower()
+
+
+def index_records(records: List[Dict[str, Any]], key_function) -> Dict[Any, List[int]]:
+    index = dict()
+
+    for i, record in enumerate(records):
+        key = key_function(record)
+
+        if key not in index:
+            index[key] = list()
+
+        index[key].append(i)
+
+    return index
+
+
+def get_field_changes(
+    old_record: Dict[str, Any], new_record: Dict[str, Any]
+) -> Dict[str, Tuple[Any, Any]]:
+    return {
+        key: (old_record.get(key), new_record.get(key))
+        for key in list(old_record) + [k for k in new_record if k not in old_record]
+        if old_record.get(key) != new_record.get(key)
+    }
+
+
+def diff_records(
+    old_records: List[Dict[str, Any]], new_records: List[Dict[str, Any]]
+) -> Dict[str, List]:
+    # Identical records are paired through their fingerprints first, whatever
+    # remains is paired by identity, so no step compares every pair of records
+    old_fingerprints = [get_fingerprint(record) for record in old_records]
+    new_by_fingerprint = index_records(
+        records=new_records, key_function=get_fingerprint
+    )
+
+    old_unmatched = list()
+    new_matched = set()
+
+    for i, fingerprint in enumerate(old_fingerprints):
+        candidates = new_by_fingerprint.get(fingerprint)
+
+        if candidates:
+            new_matched.add(candidates.pop(0))
+        else:
+            old_unmatched.append(i)
+
+    new_unmatched = [i for i in range(len(new_records)) if i not in new_matched]
+    new_by_identity = index_records(
+        records=[new_records[i] for i in new_unmatched], key_function=get_identity
+    )
+
+    changed = list()
+    removed = list()
+    paired = set()
+
+    for i in old_unmatched:
+        old_record = old_records[i]
+        candidates = new_by_identity.get(get_identity(old_record))
+
+        if not candidates:
+            removed.append(old_record)
+            continue
+
+        j = new_unmatched[candidates.pop(0)]
+        paired.add(j)
+
+        changed.append(
+            {
+                "company_name": new_records[j]["company_name"],
+                "position_title": new_records[j].get("position_title"),
+                "changes": get_field_changes(
+                    old_record=old_record, new_record=new_records[j]
+                ),
+            }
+        )
+
+    added = [new_records[j] for j in new_unmatched if j not in paired]
+
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "n_unchanged": len(new_matched),
+    }
@@ -0,0 +1,103 @@
+import argparse
+import importlib
+import sys
+from typing import List, Optional
+
+# Subcommands are only imported once chosen, so `ljetne-prakse --help` and quick
+# queries don't pay for bs4, aiohttp, tqdm and the rest on every start
+COMMANDS = {
+    "fetch": (
+        "ljetne_prakse.scripts.get_pages",
+        "Fetches the main page and all position pages.",
+    ),
+    "analyze": (
+        "ljetne_prakse.scripts.analyze_position_pages",
+        "Analyzes fetched position pages into results.",
+    ),
+    "pipeline": (
+        "ljetne_prakse.scripts.pipeline",
+        "Fetches and analyzes position pages in one go.",
+    ),
+    "watch": (
+        "ljetne_prakse.scripts.watch",
+        "Polls the main page and reports new positions.",
+    ),
+    "import": (
+        "ljetne_prakse.scripts.import_results",
+        "Imports results files into an SQLite database.",
+    ),
+    "search": (
+        "ljetne_prakse.scripts.search_positions",
+        "Searches positions in an SQLite database.",
+    ),
+    "diff": (
+        "ljetne_prakse.scripts.diff_snapshots",
+        "Compares two snapshots of positions.",
+    ),
+    "stats": (
+        "ljetne_prakse.scripts.snapshot_stats",
+        "Summarizes spots, dates, durations and pay over snapshots.",
+    ),
+    "companies": (
+        "ljetne_prakse.scripts.resolve_companies",
+        "Assigns stable IDs to companies across snapshots.",
+    ),
+    "compare-parsers": (
+        "ljetne_prakse.scripts.compare_parsers",
+        "Checks that HTML parsers give the same results.",
+    ),
+    "benchmark-imports": (
+        "ljetne_prakse.scripts.benchmark_imports",
+        "Measures how long the commands take to start.",
+    ),
+}
+
+
+def get_epilog() -> str:
+    width = max(len(command) for command in COMMANDS)
+    lines = [
+        f"  {command:<{width}}  {description}"
+        for command, (_, description) in COMMANDS.items()
+    ]
+
+    return "commands:\n" + "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        prog="ljetne-prakse",
+        description="Scrapes and analyzes FER summer practice positions.",
+        epilog=get_epilog(),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "command",
+        type=str,
+        choices=tuple(COMMANDS),
+        metavar="command",
+        help="A str representing the command to run.",
+    )
+
+    parser.add_argument(
+        "arguments",
+        nargs=argparse.REMAINDER,
+        help="The arguments of the command, see `ljetne-prakse <command> --help`.",
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    module_name, _ = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+
+    # Makes the usage line of the command read `ljetne-prakse <command>`
+    sys.argv[0] = f"ljetne-prakse {args.command}"
+
+    return module.main(argv=list(args.arguments))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import asyncio
+from functools import partial
+from pathlib import Path
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import aiohttp
+import requests
+
+from ljetne_prakse.fetching.manifest import get_conditional_headers
+from ljetne_prakse.fetching.pages import store_response
+from ljetne_prakse.fetching.rate_limit import (
+    RETRY_STATUSES,
+    AIMDController,
+    AsyncLimiter,
+    get_retry_delay,
+)
+from ljetne_prakse.fetching.sessions import get_session_cookies
+
+
+def create_client(
+    session: requests.Session, n_concurrent: int
+) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(limit=n_concurrent)
+
+    # Timeout is useless, FER throttles requests
+    return aiohttp.ClientSession(
+        connector=connector,
+        cookies=get_session_cookies(session=session),
+        headers=dict(session.headers),
+        timeout=aiohttp.ClientTimeout(total=None),
+    )
+
+
+async def fetch_page(
+    client: aiohttp.ClientSession,
+    limiter: Union[asyncio.Semaphore, AsyncLimiter],
+    href: str,
+    destination: Optional[Path],
+    entry: Optional[Dict[str, Any]] = None,
+    max_retries: int = 0,
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    request_headers = get_conditional_headers(entry=entry)
+    is_adaptive = isinstance(limiter, AsyncLimiter)
+
+    for attempt in range(max_retries + 1):
+        status = None
+        headers = None
+        error = None
+
+        try:
+            async with limiter.slot() if is_adaptive else limiter:
+                start_time = time.perf_counter()
+
+                # The status is only taken once the body is read, so a read that
+                # fails midway is retried like any other failed request
+                async with client.get(href, headers=request_headers) as response:
+                    body = await response.read()
+                    encoding = (
+                        response.get_encoding() if response.status == 200 else None
+                    )
+                    headers = response.headers
+                    status = response.status
+
+                latency = time.perf_counter() - start_time
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = e
+
+        if status is not None and status not in RETRY_STATUSES:
+            if is_adaptive:
+                await limiter.on_success(latency=latency)
+
+            # Prettifying and writing the page is CPU bound, in the loop it would
+            # stall every other request in flight
+            return href, await asyncio.get_running_loop().run_in_executor(
+                None,
+                partial(
+                    store_response,
+                    href=href,
+                    destination=destination,
+                    status=status,
+                    headers=headers,
+                    body=body,
+                    encoding=encoding,
+                    entry=entry,
+                ),
+            )
+
+        if is_adaptive:
+            limiter.on_congestion()
+
+        if attempt < max_retries:
+            await asyncio.sleep(get_retry_delay(attempt=attempt, headers=headers))
+
+    reason = error if status is None else status
+    print(f"WARNING: Couldn't fetch `{href}` because of {reason}, skipping")
+
+    return href, None
+
+
+async def fetch_pages(
+    session: requests.Session,
+    hrefs: List[str],
+    destinations: List[Optional[Path]],
+    n_concurrent: int,
+    entries: Optional[List[Optional[Dict[str, Any]]]] = None,
+    callback: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+    max_retries: int = 0,
+    controller: Optional[AIMDController] = None,
+):
+    if entries is None:
+        entries = [None] * len(hrefs)
+
+    # With a controller, n_concurrent only caps how far concurrency can grow
+    if controller is None:
+        limiter = asyncio.Semaphore(n_concurrent)
+    else:
+        limiter = AsyncLimiter(controller=controller)
+
+    async with create_client(session=session, n_concurrent=n_concurrent) as client:
+        tasks = [
+            asyncio.ensure_future(
+                fetch_page(
+                    client=client,
+                    limiter=limiter,
+                    href=href,
+                    destination=destination,
+                    entry=entry,
+                    max_retries=max_retries,
+                )
+            )
+            for href, destination, entry in zip(hrefs, destinations, entries)
+        ]
+
+        for task in asyncio.as_completed(tasks):
+            href, entry = await task
+
+            if callback is not None:
+                callback(href, entry)
+
+
+def fetch_pages_asyncio(
+    session: requests.Session,
+    hrefs: List[str],
+    destinations: List[Optional[Path]],
+    n_concurrent: int,
+    entries: Optional[List[Optional[Dict[str, Any]]]] = None,
+    callback: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+    max_retries: int = 0,
+    controller: Optional[AIMDController] = None,
+):
+    asyncio.run(
+        fetch_pages(
+            session=session,
+            hrefs=hrefs,
+            destinations=destinations,
+            n_concurrent=n_concurrent,
+            entries=entries,
+            callback=callback,
+            max_retries=max_retries,
+            controller=controller,
+        )
+    )
@@ -0,0 +1,69 @@
+import json
+import os
+from pathlib import Path
+import time
+from typing import Set
+
+
+def load_completed_urls(path: Path) -> Set[str]:
+    completed_urls = set()
+
+    if not os.path.exists(path):
+        return completed_urls
+
+    with open(path, encoding="utf8", errors="replace") as f:
+        for line in f:
+            # A crash can cut the last line short, it's simply fetched again
+            try:
+                completed_urls.add(json.loads(line)["url"])
+            except (ValueError, KeyError):
+                continue
+
+    return completed_urls
+
+
+class CrawlJournal:
+    def __init__(
+        self,
+        path: Path,
+        append: bool = False,
+        sync_every: int = 32,
+        sync_interval: float = 5.0,
+    ):
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self._file = open(self.path, mode="a" if append else "w", encoding="utf8")
+        self._n_unsynced = 0
+        self._last_sync_time = time.monotonic()
+
+    def record(self, url: str, name: str):
+        self._file.write(json.dumps({"url": url, "name": name}) + "\n")
+        self._file.flush()
+        self._n_unsynced += 1
+
+        # fsync is what makes an entry survive a crash, but doing it for every
+        # page would cost more than fetching it
+        if (
+            self._n_unsynced >= self.sync_every
+            or time.monotonic() - self._last_sync_time >= self.sync_interval
+        ):
+            self.sync()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self._n_unsynced = 0
+        self._last_sync_time = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,138 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from ljetne_prakse.fetching.manifest import link_or_copy
+from ljetne_prakse.fetching.pages import PAGE_CONTENT_TYPE, save_page
+from ljetne_prakse.storage.archive import PageArchive, PageArchiveWriter
+
+LISTING_NAME = "listing.json"
+
+# A position page is only fetched again if one of these changed on the main page
+LISTING_FIELDS = ("company", "company_url", "n_spots", "position")
+
+
+def save_listing(listing: Dict[str, Dict[str, Any]], path: Path):
+    temporary_path = Path(path).with_name(Path(path).name + ".tmp")
+
+    with open(temporary_path, mode="w+", encoding="utf8") as f:
+        json.dump(listing, f, ensure_ascii=False, indent=2)
+
+    os.replace(temporary_path, path)
+
+
+def load_listing(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not os.path.isfile(path):
+        return dict()
+
+    with open(path, encoding="utf8") as f:
+        return json.load(f)
+
+
+def find_previous_snapshot(snapshot_folder: Path) -> Optional[Path]:
+    # Snapshot folders are named by timestamp, so the previous one is the last
+    # folder before this one that has a listing
+    snapshot_folder = Path(snapshot_folder).resolve()
+    root = snapshot_folder.parent
+
+    folders = sorted(
+        root / folder_name
+        for folder_name in os.listdir(root)
+        if folder_name < snapshot_folder.name
+        and os.path.isfile(root / folder_name / LISTING_NAME)
+    )
+
+    return folders[-1] if len(folders) != 0 else None
+
+
+def get_unchanged_urls(
+    previous_listing: Dict[str, Dict[str, Any]],
+    listing: Dict[str, Dict[str, Any]],
+) -> Set[str]:
+    unchanged_urls = set()
+
+    for url, row in listing.items():
+        previous_row = previous_listing.get(url)
+
+        if previous_row is None:
+            continue
+
+        if all(previous_row.get(field) == row.get(field) for field in LISTING_FIELDS):
+            unchanged_urls.add(url)
+
+    return unchanged_urls
+
+
+class SnapshotPages:
+    # Copies pages out of a previous snapshot, wherever that snapshot kept them
+    def __init__(self, snapshot_folder: Path, pages_folder_name: str):
+        self.pages_folder = Path(snapshot_folder) / pages_folder_name
+
+        archive_path = Path(snapshot_folder) / f"{pages_folder_name}.archive"
+
+        if os.path.isfile(archive_path):
+            self._archive = PageArchive(path=archive_path)
+            self._archive_indices = {
+                name: i for i, name in enumerate(self._archive.get_names())
+            }
+        else:
+            self._archive = None
+            self._archive_indices = dict()
+
+    def copy_page(
+        self,
+        previous_name: str,
+        name: str,
+        url: str,
+        destination: Optional[Path] = None,
+        archive: Optional[PageArchiveWriter] = None,
+    ) -> bool:
+        source = self.pages_folder / previous_name
+
+        if archive is not None:
+            if previous_name in self._archive_indices:
+                record = self._archive.get_record(self._archive_indices[previous_name])
+                status, headers, body = (
+                    record["status"],
+                    record["headers"],
+                    record["body"],
+                )
+            elif os.path.isfile(source):
+                # Saved pages are always UTF-8 and only the body is kept
+                with open(source, mode="rb") as f:
+                    body = f.read()
+
+                status, headers = 200, {"Content-Type": PAGE_CONTENT_TYPE}
+            else:
+                return False
+
+            archive.append(
+                name=name, url=url, status=status, headers=headers, body=body
+            )
+
+            return True
+
+        if destination is not None and os.path.isfile(source):
+            link_or_copy(source=source, destination=destination)
+
+            return True
+
+        if destination is not None and previous_name in self._archive_indices:
+            text = self._archive.get_text(self._archive_indices[previous_name])
+
+            save_page(page_text=text, destination=destination)
+
+            return True
+
+        return False
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
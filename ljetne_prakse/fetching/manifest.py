@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import Any, Dict, Optional
+
+
+def load_manifest(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return dict()
+
+    with open(path, encoding="utf8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: Dict[str, Dict[str, Any]], path: Path):
+    path = Path(path)
+
+    if not os.path.exists(path.parent):
+        os.makedirs(path.parent)
+
+    temporary_path = path.with_name(path.name + ".tmp")
+
+    with open(temporary_path, mode="w+", encoding="utf8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    os.replace(temporary_path, path)
+
+
+def hash_body(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def get_previous_path(entry: Optional[Dict[str, Any]]) -> Optional[Path]:
+    if entry is None or entry.get("path") is None:
+        return None
+
+    path = Path(entry["path"])
+
+    if not os.path.isfile(path):
+        return None
+
+    return path
+
+
+def get_conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    # Without the previous file there is nothing to fall back to on a 304
+    if get_previous_path(entry=entry) is None:
+        return dict()
+
+    headers = dict()
+
+    if entry.get("etag") is not None:
+        headers["If-None-Match"] = entry["etag"]
+
+    if entry.get("last_modified") is not None:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    return headers
+
+
+def link_or_copy(source: Path, destination: Path):
+    if os.path.exists(destination):
+        os.remove(destination)
+
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
@@ -0,0 +1,147 @@
+from contextlib import nullcontext
+import os
+from pathlib import Path
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from bs4 import BeautifulSoup
+import requests
+
+from ljetne_prakse.fetching.manifest import (
+    get_conditional_headers,
+    get_previous_path,
+    hash_body,
+    link_or_copy,
+)
+from ljetne_prakse.fetching.rate_limit import (
+    RETRY_STATUSES,
+    ThreadLimiter,
+    get_retry_delay,
+)
+
+PAGE_CONTENT_TYPE = "text/html; charset=utf-8"
+
+
+def prettify_page(page_text: str) -> str:
+    return BeautifulSoup(page_text, "html.parser").prettify()
+
+
+def save_page(page_text: str, destination: Path):
+    page_text = prettify_page(page_text=page_text)
+
+    # The destination can be a hard link shared with other snapshots
+    if os.path.exists(destination):
+        os.remove(destination)
+
+    with open(
+        destination,
+        mode="w+",
+        encoding="utf8",
+        errors="replace",
+    ) as f:
+        f.write(page_text)
+
+
+def store_response(
+    href: str,
+    destination: Optional[Path],
+    status: int,
+    headers: Mapping[str, str],
+    body: bytes,
+    encoding: Optional[str],
+    entry: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    previous_path = get_previous_path(entry=entry)
+
+    if status == 304 and previous_path is not None:
+        link_or_copy(source=previous_path, destination=destination)
+
+        return {**entry, "path": str(destination)}
+
+    if status != 200:
+        print(f"WARNING: Couldn't fetch `{href}`, skipping")
+        return None
+
+    sha256 = hash_body(body=body)
+
+    # Without a destination the raw response is handed back to the caller,
+    # e.g. to be appended to a page archive. It's only prettified when analyzed
+    if destination is None:
+        return {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "sha256": sha256,
+            "path": None,
+            "response": {"status": status, "headers": dict(headers), "body": body},
+        }
+
+    if previous_path is not None and entry.get("sha256") == sha256:
+        link_or_copy(source=previous_path, destination=destination)
+    else:
+        page_text = body.decode(encoding or "utf8", errors="replace")
+        save_page(page_text=page_text, destination=destination)
+
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "sha256": sha256,
+        "path": str(destination),
+    }
+
+
+def fetch_and_save_page(
+    session: requests.Session,
+    href: str,
+    destination: Optional[Path],
+    entry: Optional[Dict[str, Any]] = None,
+    max_retries: int = 0,
+    limiter: Optional[ThreadLimiter] = None,
+) -> Optional[Dict[str, Any]]:
+    headers = get_conditional_headers(entry=entry)
+
+    for attempt in range(max_retries + 1):
+        position_page = None
+        error = None
+
+        try:
+            with nullcontext() if limiter is None else limiter.slot():
+                start_time = time.perf_counter()
+                # Timeout is useless, FER throttles requests
+                position_page = session.get(href, headers=headers)
+                latency = time.perf_counter() - start_time
+        except requests.RequestException as e:
+            error = e
+
+        should_retry = (
+            position_page is None or position_page.status_code in RETRY_STATUSES
+        )
+
+        if not should_retry:
+            if limiter is not None:
+                limiter.on_success(latency=latency)
+
+            return store_response(
+                href=href,
+                destination=destination,
+                status=position_page.status_code,
+                headers=position_page.headers,
+                body=position_page.content,
+                encoding=position_page.encoding or position_page.apparent_encoding,
+                entry=entry,
+            )
+
+        if limiter is not None:
+            limiter.on_congestion()
+
+        if attempt < max_retries:
+            time.sleep(
+                get_retry_delay(
+                    attempt=attempt,
+                    headers=None if position_page is None else position_page.headers,
+                )
+            )
+
+    reason = error if position_page is None else position_page.status_code
+    print(f"WARNING: Couldn't fetch `{href}` because of {reason}, skipping")
+
+    return None
@@ -0,0 +1,62 @@
+import multiprocessing
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from ljetne_prakse.fetching.pages import fetch_and_save_page
+from ljetne_prakse.fetching.sessions import create_pooled_session, get_session_cookies
+
+_WORKER_SESSION: Optional[requests.Session] = None
+_WORKER_MAX_RETRIES = 0
+
+
+def initialize_worker(
+    cookies: Dict[str, str], headers: Dict[str, str], max_retries: int = 0
+):
+    global _WORKER_SESSION, _WORKER_MAX_RETRIES
+
+    _WORKER_SESSION = create_pooled_session(cookies=cookies, headers=headers)
+    _WORKER_MAX_RETRIES = max_retries
+
+
+def process_page(args):
+    href, destination, entry = args
+
+    return href, fetch_and_save_page(
+        session=_WORKER_SESSION,
+        href=href,
+        destination=destination,
+        entry=entry,
+        max_retries=_WORKER_MAX_RETRIES,
+    )
+
+
+def fetch_pages_multiprocessing(
+    session: requests.Session,
+    hrefs: List[str],
+    destinations: List[Optional[Path]],
+    n_processes: int,
+    entries: Optional[List[Optional[Dict[str, Any]]]] = None,
+    callback: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+    max_retries: int = 0,
+):
+    if entries is None:
+        entries = [None] * len(hrefs)
+
+    # Each worker builds its own keep-alive session once, instead of getting
+    # the logged-in session pickled into every task.
+    with multiprocessing.Pool(
+        n_processes,
+        initializer=initialize_worker,
+        initargs=(
+            get_session_cookies(session=session),
+            dict(session.headers),
+            max_retries,
+        ),
+    ) as pool:
+        for href, entry in pool.imap_unordered(
+            process_page, iterable=zip(hrefs, destinations, entries)
+        ):
+            if callback is not None:
+                callback(href, entry)
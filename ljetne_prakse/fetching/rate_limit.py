@@ -0,0 +1,159 @@
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+import random
+import threading
+import time
+from typing import Mapping, Optional
+
+# FER answers with these when it throttles us or is overloaded
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+def get_backoff_delay(
+    attempt: int, base_delay: float = 0.5, max_delay: float = 30.0
+) -> float:
+    # Full jitter keeps retrying clients from hitting the server in lockstep
+    return random.uniform(0.0, min(max_delay, base_delay * 2**attempt))
+
+
+def get_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    if headers is None or headers.get("Retry-After") is None:
+        return None
+
+    try:
+        return max(0.0, float(headers["Retry-After"]))
+    except ValueError:
+        return None
+
+
+def get_retry_delay(attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+    retry_after = get_retry_after(headers=headers)
+
+    if retry_after is not None:
+        return retry_after
+
+    return get_backoff_delay(attempt=attempt)
+
+
+class AIMDController:
+    def __init__(
+        self,
+        initial_limit: float = 4.0,
+        min_limit: float = 1.0,
+        max_limit: float = 32.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.2,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+
+        self.limit = min(max(initial_limit, min_limit), max_limit)
+
+        self.smoothed_latency: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+
+        self._last_decrease_time = float("-inf")
+
+    def on_success(self, latency: float):
+        if self.smoothed_latency is None:
+            self.smoothed_latency = latency
+        else:
+            self.smoothed_latency += self.smoothing * (latency - self.smoothed_latency)
+
+        if (
+            self.baseline_latency is None
+            or self.smoothed_latency < self.baseline_latency
+        ):
+            self.baseline_latency = self.smoothed_latency
+
+        if self.smoothed_latency > self.latency_tolerance * self.baseline_latency:
+            self.on_congestion()
+            return
+
+        # Roughly +1 per full window of successful requests, like TCP
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def on_congestion(self):
+        now = time.monotonic()
+
+        # Responses to requests sent before the last decrease still reflect the
+        # old limit, so only back off once per round trip
+        if self.smoothed_latency is not None and (
+            now - self._last_decrease_time < self.smoothed_latency
+        ):
+            return
+
+        self._last_decrease_time = now
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+
+    @property
+    def n_allowed(self) -> int:
+        return max(1, int(self.limit))
+
+
+class ThreadLimiter:
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+
+        self._condition = threading.Condition()
+        self._n_in_flight = 0
+
+    @contextmanager
+    def slot(self):
+        with self._condition:
+            while self._n_in_flight >= self.controller.n_allowed:
+                self._condition.wait()
+
+            self._n_in_flight += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._n_in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self, latency: float):
+        with self._condition:
+            self.controller.on_success(latency=latency)
+            self._condition.notify_all()
+
+    def on_congestion(self):
+        with self._condition:
+            self.controller.on_congestion()
+
+
+class AsyncLimiter:
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+
+        self._condition = asyncio.Condition()
+        self._n_in_flight = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._n_in_flight < self.controller.n_allowed
+            )
+
+            self._n_in_flight += 1
+
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._n_in_flight -= 1
+                self._condition.notify_all()
+
+    async def on_success(self, latency: float):
+        async with self._condition:
+            self.controller.on_success(latency=latency)
+            self._condition.notify_all()
+
+    def on_congestion(self):
+        self.controller.on_congestion()
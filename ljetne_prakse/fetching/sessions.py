@@ -0,0 +1,34 @@
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def mount_connection_pool(session: requests.Session, pool_size: int):
+    # A single host is crawled, so one pool with `pool_size` keep-alive
+    # connections is enough; blocking keeps us from opening extra sockets.
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def create_pooled_session(
+    cookies: Dict[str, str],
+    headers: Optional[Dict[str, str]] = None,
+    pool_size: int = 1,
+) -> requests.Session:
+    session = requests.Session()
+
+    if headers is not None:
+        session.headers.update(headers)
+
+    session.cookies = requests.utils.cookiejar_from_dict(cookies)
+
+    return mount_connection_pool(session=session, pool_size=pool_size)
+
+
+def get_session_cookies(session: requests.Session) -> Dict[str, str]:
+    return requests.utils.dict_from_cookiejar(session.cookies)
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from ljetne_prakse.fetching.pages import fetch_and_save_page
+from ljetne_prakse.fetching.rate_limit import AIMDController, ThreadLimiter
+from ljetne_prakse.fetching.sessions import mount_connection_pool
+
+
+def fetch_pages_threads(
+    session: requests.Session,
+    hrefs: List[str],
+    destinations: List[Optional[Path]],
+    n_threads: int,
+    entries: Optional[List[Optional[Dict[str, Any]]]] = None,
+    callback: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+    max_retries: int = 0,
+    controller: Optional[AIMDController] = None,
+):
+    if entries is None:
+        entries = [None] * len(hrefs)
+
+    # With a controller, n_threads only caps how far concurrency can grow
+    limiter = None if controller is None else ThreadLimiter(controller=controller)
+
+    session = mount_connection_pool(session=session, pool_size=n_threads)
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        futures = {
+            executor.submit(
+                fetch_and_save_page,
+                session=session,
+                href=href,
+                destination=destination,
+                entry=entry,
+                max_retries=max_retries,
+                limiter=limiter,
+            ): href
+            for href, destination, entry in zip(hrefs, destinations, entries)
+        }
+
+        for future in as_completed(futures):
+            entry = future.result()
+
+            if callback is not None:
+                callback(futures[future], entry)
@@ -1,8 +1,21 @@
 from getpass import getpass
-from typing import Optional
+import json
+import os
+from pathlib import Path
+import sys
+import time
+import traceback
+from typing import Optional, Tuple
 
 import requests
 
+INTRANET_URL = "https://www.fer.unizg.hr/intranet"
+COOKIE_FIELDS = ("name", "value", "domain", "path", "expires", "secure")
+# The cookie FERweb keeps the login in, other cookies can expire on their own
+SESSION_COOKIE_NAME = "PHPSESSID"
+USERNAME_VARIABLE = "FERWEB_USERNAME"
+PASSWORD_VARIABLE = "FERWEB_PASSWORD"
+
 
 def login_to_fer(
     username: Optional[str] = None,
@@ -20,7 +33,130 @@ def login_to_fer(
     session = requests.Session()
     response = session.post(endpoint_url, data=payload, files=payload)
 
-    if str(response.url).strip() != "https://www.fer.unizg.hr/intranet":
+    if str(response.url).strip() != INTRANET_URL:
         raise RuntimeError("Login failed! Check credentials!")
 
     return session
+
+
+def prompt_login_to_fer() -> Tuple[requests.Session, str]:
+    while True:
+        try:
+            username = input("Username: ")
+            password = getpass("Password: ")
+
+            session = login_to_fer(username=username, password=password)
+            break
+        except RuntimeError:
+            print(f"Login failed because: {traceback.format_exc()}", file=sys.stderr)
+
+    return session, username
+
+
+def save_session_cookies(session: requests.Session, username: str, path: Path):
+    cookies = [
+        {field: getattr(cookie, field) for field in COOKIE_FIELDS}
+        for cookie in session.cookies
+    ]
+
+    if not os.path.exists(Path(path).parent):
+        os.makedirs(Path(path).parent)
+
+    # The cookies are as good as a password, so the file is only readable by us
+    tmp_path = Path(f"{path}.tmp")
+    descriptor = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+
+    with os.fdopen(descriptor, mode="w", encoding="utf8") as f:
+        json.dump({"username": username, "cookies": cookies}, f, indent=2)
+
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)
+
+
+def load_session_cookies(
+    path: Path, session_cookie_name: str = SESSION_COOKIE_NAME
+) -> Optional[Tuple[requests.Session, str]]:
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        with open(path, encoding="utf8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        print(f"WARNING: Couldn't read saved cookies from {path}", file=sys.stderr)
+        return None
+
+    now = time.time()
+    session = requests.Session()
+
+    for cookie in saved.get("cookies", list()):
+        if cookie.get("expires") is not None and cookie["expires"] <= now:
+            if cookie["name"] == session_cookie_name:
+                return None
+
+            continue
+
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain"),
+            path=cookie.get("path", "/"),
+            expires=cookie.get("expires"),
+            secure=cookie.get("secure", False),
+        )
+
+    if len(session.cookies) == 0:
+        return None
+
+    return session, str(saved.get("username"))
+
+
+def is_session_valid(session: requests.Session, check_url: str = INTRANET_URL) -> bool:
+    # A logged out session gets redirected to the login page, so a single request
+    # without following redirects is enough to tell. Network errors are raised, an
+    # unreachable server says nothing about the session
+    response = session.get(check_url, allow_redirects=False, timeout=10)
+
+    return response.status_code == 200
+
+
+def get_fer_session(
+    cookies_path: Optional[Path] = None,
+    check_url: str = INTRANET_URL,
+    interactive: bool = True,
+) -> Tuple[requests.Session, str]:
+    if cookies_path is not None:
+        saved = load_session_cookies(path=cookies_path)
+
+        if saved is not None:
+            session, username = saved
+
+            if is_session_valid(session=session, check_url=check_url):
+                print(f"Reusing saved session cookies from {cookies_path}")
+
+                # The server may have refreshed cookies while checking the session
+                save_session_cookies(
+                    session=session, username=username, path=cookies_path
+                )
+
+                return session, username
+
+            print("Saved session cookies expired, logging in again")
+
+    username = os.environ.get(USERNAME_VARIABLE)
+    password = os.environ.get(PASSWORD_VARIABLE)
+
+    if username and password:
+        session = login_to_fer(username=username, password=password)
+    elif interactive:
+        session, username = prompt_login_to_fer()
+    else:
+        raise RuntimeError(
+            "Couldn't log in without asking for credentials. Save session cookies "
+            f"or set {USERNAME_VARIABLE} and {PASSWORD_VARIABLE}"
+        )
+
+    if cookies_path is not None:
+        save_session_cookies(session=session, username=username, path=cookies_path)
+
+    return session, username
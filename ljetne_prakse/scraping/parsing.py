@@ -0,0 +1,41 @@
+from typing import Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+DEFAULT_PARSER = "html.parser"
+PARSERS = ("html.parser", "lxml")
+
+ROOT_TAG = "div"
+ROOT_CLASS = "fer_ljetna_praksa"
+
+
+def get_available_parsers() -> Tuple[str, ...]:
+    return tuple(
+        parser for parser in PARSERS if builder_registry.lookup(parser) is not None
+    )
+
+
+def check_parser(parser: str):
+    if parser not in PARSERS:
+        raise RuntimeError(f"Unknown parser `{parser}`, expected one of {PARSERS}")
+
+    if parser not in get_available_parsers():
+        raise RuntimeError(
+            f"Parser `{parser}` is not installed, try `pip install {parser}`"
+        )
+
+
+def parse_page(
+    page_text: str,
+    parser: str = DEFAULT_PARSER,
+    only_root: bool = False,
+) -> BeautifulSoup:
+    # Everything we analyze lives under the practice root, so the rest of the
+    # document (menus, scripts, footers) can be skipped while building the tree
+    if only_root:
+        parse_only = SoupStrainer(ROOT_TAG, attrs={"class": ROOT_CLASS})
+    else:
+        parse_only = None
+
+    return BeautifulSoup(page_text, parser, parse_only=parse_only)
@@ -1,10 +1,26 @@
+from functools import lru_cache
 import regex
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 from bs4 import BeautifulSoup
 import html2markdown
+import unidecode
 
+from ljetne_prakse.scraping.records import Position
+
+# Bump whenever the analysis output changes, so cached analyses get invalidated
+ANALYSIS_VERSION = 2
 
 COMBINED_NEWLINE_PATTERN = r"([^\S\n]*\n+[^\S\n]*)+"
 COMPANY_TEXT_SUFFIX_PATTERN = r"\[[^\]]*\]\s*$"
@@ -18,6 +34,10 @@ DATE_DELIMITER_REGEX = regex.compile(DATE_DELIMITER_PATTERN)
 SOFT_WHITESPACE_REGEX = regex.compile(SOFT_WHITESPACE_PATTERN)
 WHITESPACE_REGEX = regex.compile(WHITESPACE_PATTERN)
 
+# Company descriptions repeat for every position a company posts, so their
+# normalized form is memoized for the whole run
+NORMALIZATION_CACHE_SIZE = 4096
+
 
 # region Elements
 def get_position_page_rows(
@@ -61,6 +81,54 @@ def get_position_page_rows(
     return rows
 
 
+# endregion
+
+
+# region Normalization
+def _collapse_whitespace(match: regex.Match) -> str:
+    if match.start() == 0 or match.end() == len(match.string):
+        return ""
+
+    return " "
+
+
+def _collapse_whitespace_keep_newlines(match: regex.Match) -> str:
+    if match.start() == 0 or match.end() == len(match.string):
+        return ""
+
+    return "\n" if "\n" in match.group() else " "
+
+
+def normalize_whitespace(text: str, keep_newlines: bool = False) -> str:
+    # A single pass over whitespace runs that does the work of stripping and then
+    # collapsing runs (and COMBINED_NEWLINE_REGEX if newlines are kept). The
+    # final strip only catches characters str.strip removes but \s doesn't match
+    if keep_newlines:
+        text = WHITESPACE_REGEX.sub(_collapse_whitespace_keep_newlines, text)
+    else:
+        text = WHITESPACE_REGEX.sub(_collapse_whitespace, text)
+
+    return text.strip()
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def normalize_markdown(text: str, keep_newlines: bool = False) -> str:
+    text = html2markdown.convert(text)
+
+    return normalize_whitespace(text=text, keep_newlines=keep_newlines)
+
+
+def get_normalization_cache_info() -> Dict[str, int]:
+    cache_info = normalize_markdown.cache_info()
+
+    return {
+        "hits": cache_info.hits,
+        "misses": cache_info.misses,
+        "size": cache_info.currsize,
+        "max_size": cache_info.maxsize,
+    }
+
+
 # endregion
 
 # region Analysis
@@ -69,66 +137,36 @@ def get_position_page_rows(
 def analyze_company(company: BeautifulSoup) -> Tuple[str, Optional[str]]:
     text = company.text
     text = COMPANY_TEXT_SUFFIX_REGEX.sub("", text)
-    text = text.strip()
-    text = WHITESPACE_REGEX.sub(" ", text)
+    text = normalize_whitespace(text)
 
     anchor = company.find("a")
     href = None if anchor is None else anchor.get("href")
 
     if href is not None:
-        href = str(href).strip()
-        href = WHITESPACE_REGEX.sub(" ", href)
+        href = normalize_whitespace(str(href))
         href = href.lower()
 
     return text, href
 
 
 def analyze_company_description(company_description: BeautifulSoup) -> str:
-    text = company_description.text
-    text = html2markdown.convert(text)
-    text = COMBINED_NEWLINE_REGEX.sub("\n", text)
-    text = text.strip()
-    text = SOFT_WHITESPACE_REGEX.sub(" ", text)
-
-    return text
+    return normalize_markdown(company_description.text, keep_newlines=True)
 
 
 def analyze_n_spots(n_spots: BeautifulSoup) -> str:
-    text = n_spots.text
-    text = text.strip()
-    text = WHITESPACE_REGEX.sub(" ", text)
-
-    return text
+    return normalize_whitespace(n_spots.text)
 
 
 def analyze_position(position: BeautifulSoup) -> str:
-    text = position.text
-    text = html2markdown.convert(text)
-    text = COMBINED_NEWLINE_REGEX.sub("\n", text)
-    text = text.strip()
-    text = SOFT_WHITESPACE_REGEX.sub(" ", text)
-
-    return text
+    return normalize_markdown(position.text, keep_newlines=True)
 
 
 def analyze_position_desc(position_desc: BeautifulSoup) -> str:
-    text = position_desc.text
-    text = html2markdown.convert(text)
-    text = COMBINED_NEWLINE_REGEX.sub("\n", text)
-    text = text.strip()
-    text = SOFT_WHITESPACE_REGEX.sub(" ", text)
-
-    return text
+    return normalize_markdown(position_desc.text, keep_newlines=True)
 
 
 def analyze_competences(competences: BeautifulSoup) -> str:
-    text = competences.text
-    text = html2markdown.convert(text)
-    text = COMBINED_NEWLINE_REGEX.sub("\n", text)
-    text = text.strip()
-    text = SOFT_WHITESPACE_REGEX.sub(" ", text)
-
-    return text
+    return normalize_markdown(competences.text, keep_newlines=True)
 
 
 def analyze_planned_start(
@@ -166,54 +204,93 @@ def analyze_planned_end(
 
 
 def analyze_compensation(compensation: BeautifulSoup) -> str:
-    text = compensation.text
-    text = html2markdown.convert(text)
-    text = text.strip()
-    text = WHITESPACE_REGEX.sub(" ", text)
-
-    return text
+    return normalize_markdown(compensation.text)
 
 
 def analyze_location(location: BeautifulSoup) -> str:
-    text = location.text
-    text = html2markdown.convert(text)
-    text = text.strip()
-    text = WHITESPACE_REGEX.sub(" ", text)
-
-    return text
-
-
-TITLE_TO_KEYS = {
-    "tvrtka": ("company_name", "company_url"),
-    "opis tvrtke": "company_desc",
-    "raspoloživih mjesta": "n_spots",
-    "pozicija": "position_title",
-    "opis": "position_desc",
-    "kompetencije": "competences",
-    "planirani početak": "planned_start",
-    "planirani završetak": "planned_end",
-    "honoriranje prakse": "compensation",
-    "adresa prakse": "location",
-}
-
-TITLE_TO_FUNCTION = {
-    "tvrtka": analyze_company,
-    "opis tvrtke": analyze_company_description,
-    "raspoloživih mjesta": analyze_n_spots,
-    "pozicija": analyze_position,
-    "opis": analyze_position_desc,
-    "kompetencije": analyze_competences,
-    "planirani početak": analyze_planned_start,
-    "planirani završetak": analyze_planned_end,
-    "honoriranje prakse": analyze_compensation,
-    "adresa prakse": analyze_location,
-}
+    return normalize_markdown(location.text)
+
+
+class Field(NamedTuple):
+    keys: Tuple[str, ...]
+    function: Callable[[BeautifulSoup], Any]
+    labels: Tuple[str, ...]
+
+
+# Labels are matched after normalize_label, so accents, case, spacing and a
+# trailing colon don't matter; extra spellings only need to go into labels
+POSITION_PAGE_SCHEMA = (
+    Field(("company_name", "company_url"), analyze_company, ("tvrtka",)),
+    Field(("company_desc",), analyze_company_description, ("opis tvrtke",)),
+    Field(("n_spots",), analyze_n_spots, ("raspoloživih mjesta", "broj mjesta")),
+    Field(("position_title",), analyze_position, ("pozicija",)),
+    Field(("position_desc",), analyze_position_desc, ("opis", "opis pozicije")),
+    Field(("competences",), analyze_competences, ("kompetencije",)),
+    Field(("planned_start",), analyze_planned_start, ("planirani početak",)),
+    Field(("planned_end",), analyze_planned_end, ("planirani završetak",)),
+    Field(("compensation",), analyze_compensation, ("honoriranje prakse",)),
+    Field(("location",), analyze_location, ("adresa prakse",)),
+)
+
+# Rows with labels that aren't in the schema end up here instead of failing
+OVERFLOW_KEY = "other_fields"
+
+
+@lru_cache(maxsize=256)
+def normalize_label(text: str) -> str:
+    text = unidecode.unidecode(normalize_whitespace(text)).lower()
+
+    return text.rstrip(":").rstrip()
+
+
+def get_field_names(schema: Tuple[Field, ...] = POSITION_PAGE_SCHEMA) -> List[str]:
+    return [key for field in schema for key in field.keys]
+
+
+def check_fields(
+    fields: Iterable[str], schema: Tuple[Field, ...] = POSITION_PAGE_SCHEMA
+):
+    field_names = get_field_names(schema=schema)
+
+    for field in fields:
+        if field not in field_names and field != OVERFLOW_KEY:
+            raise RuntimeError(
+                f"Unknown field `{field}`, expected one of "
+                f"{(*field_names, OVERFLOW_KEY)}"
+            )
+
+
+@lru_cache(maxsize=None)
+def compile_schema(
+    fields: Optional[FrozenSet[str]] = None,
+    schema: Tuple[Field, ...] = POSITION_PAGE_SCHEMA,
+) -> Dict[str, Optional[Tuple[Tuple[Optional[str], ...], Callable]]]:
+    # Maps every normalized label to the keys its analyzer fills in. Keys that
+    # weren't selected are None and labels of fields that aren't needed at all
+    # map to None, so their analyzers never run
+    dispatch_table = dict()
+
+    for field in schema:
+        keys = tuple(
+            key if fields is None or key in fields else None for key in field.keys
+        )
+        entry = None if all(key is None for key in keys) else (keys, field.function)
+
+        for label in field.labels:
+            dispatch_table[normalize_label(label)] = entry
+
+    return dispatch_table
 
 
 def analyze_position_page_rows(
-    position_page_rows: List[Tuple[BeautifulSoup, BeautifulSoup]]
-) -> Dict[str, Any]:
-    to_return = dict()
+    position_page_rows: List[Tuple[BeautifulSoup, BeautifulSoup]],
+    fields: Optional[FrozenSet[str]] = None,
+) -> Position:
+    dispatch_table = compile_schema(fields=fields)
+    keep_overflow = fields is None or OVERFLOW_KEY in fields
+
+    position = Position()
+    overflow = dict()
 
     for row in position_page_rows:
         label, content = row
@@ -224,21 +301,31 @@ def analyze_position_page_rows(
         if content is None:
             raise RuntimeError("Couldn't parse position row content")
 
-        label = label.text
-        label = label.strip()
-        label = WHITESPACE_REGEX.sub(" ", label)
-        label = label.lower()
+        label = normalize_label(label.text)
+
+        if label not in dispatch_table:
+            if keep_overflow:
+                overflow[label] = normalize_markdown(content.text, keep_newlines=True)
+            continue
 
-        keys = TITLE_TO_KEYS[label]
-        function = TITLE_TO_FUNCTION[label]
+        entry = dispatch_table[label]
 
-        if isinstance(keys, str):
-            to_return[keys] = function(content)
+        if entry is None:
+            continue
+
+        keys, function = entry
+
+        if len(keys) == 1:
+            position.set(keys[0], function(content))
         else:
             for key, result in zip(keys, function(content)):
-                to_return[key] = result
+                if key is not None:
+                    position.set(key, result)
+
+    if len(overflow) != 0:
+        position.set(OVERFLOW_KEY, overflow)
 
-    return to_return
+    return position
 
 
 # endregion
@@ -0,0 +1,179 @@
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Position and company records keep the fields of a position page in slots
+# instead of a dict per record. Repeated short values are interned and companies
+# are shared between their positions, so a company description is kept only once.
+# A field that wasn't extracted is simply left unset, to_dict then skips it.
+
+POSITION_SLOTS = {
+    "n_spots": "n_spots",
+    "position_title": "title",
+    "position_desc": "description",
+    "competences": "competences",
+    "planned_start": "planned_start",
+    "planned_end": "planned_end",
+    "compensation": "compensation",
+    "location": "location",
+    "other_fields": "other_fields",
+}
+COMPANY_SLOTS = {
+    "company_name": "name",
+    "company_url": "url",
+    "company_desc": "description",
+}
+
+# Only fields with few distinct values are interned, free text like titles and
+# descriptions is nearly always unique and would just fill the intern table
+INTERNED_SLOTS = {"n_spots", "compensation", "location"}
+INTERNED_COMPANY_SLOTS = {"name", "url"}
+
+
+def intern_text(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def to_date(value: Any) -> Any:
+    # JSON brings dates back as lists
+    return tuple(value) if type(value) is list else value
+
+
+class Company:
+    __slots__ = tuple(COMPANY_SLOTS.values())
+
+    def get_key(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, slot, None) for slot in self.__slots__)
+
+    def to_dict(self, include_name: bool = True) -> Dict[str, Any]:
+        record = dict()
+
+        for key, slot in COMPANY_SLOTS.items():
+            if (include_name or slot != "name") and hasattr(self, slot):
+                record[key] = getattr(self, slot)
+
+        return record
+
+
+class Position:
+    __slots__ = ("company", *POSITION_SLOTS.values())
+
+    def __init__(self, company: Optional[Company] = None):
+        self.company = Company() if company is None else company
+
+    def set(self, key: str, value: Any):
+        slot = COMPANY_SLOTS.get(key)
+
+        if slot is not None:
+            if slot in INTERNED_COMPANY_SLOTS:
+                value = intern_text(value)
+
+            setattr(self.company, slot, value)
+            return
+
+        slot = POSITION_SLOTS[key]
+
+        if slot in INTERNED_SLOTS:
+            value = intern_text(value)
+        elif slot == "planned_start" or slot == "planned_end":
+            value = to_date(value)
+
+        setattr(self, slot, value)
+
+    @property
+    def company_name(self) -> Optional[str]:
+        return getattr(self.company, "name", None)
+
+    def to_dict(self, include_company_name: bool = True) -> Dict[str, Any]:
+        record = self.company.to_dict(include_name=include_company_name)
+
+        for key, slot in POSITION_SLOTS.items():
+            if hasattr(self, slot):
+                record[key] = getattr(self, slot)
+
+        return record
+
+    @classmethod
+    def from_dict(
+        cls,
+        record: Dict[str, Any],
+        company_name: Optional[str] = None,
+        companies: Optional["CompanyRegistry"] = None,
+    ) -> "Position":
+        position = cls()
+
+        if company_name is not None:
+            position.set("company_name", company_name)
+
+        for key, value in record.items():
+            position.set(key, value)
+
+        if companies is not None:
+            companies.share(position=position)
+
+        return position
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Position):
+            return NotImplemented
+
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Position({self.to_dict()!r})"
+
+
+class CompanyRegistry:
+    # Gives positions of the same company one shared Company object
+    def __init__(self):
+        self.companies: Dict[Tuple[Any, ...], Company] = dict()
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+    def share(self, position: Position):
+        key = position.company.get_key()
+        position.company = self.companies.setdefault(key, position.company)
+
+
+def load_regrouped_positions(
+    regrouped_results: Dict[str, List[Dict[str, Any]]],
+    companies: Optional[CompanyRegistry] = None,
+) -> List[Position]:
+    if companies is None:
+        companies = CompanyRegistry()
+
+    return [
+        Position.from_dict(
+            record=result, company_name=company_name, companies=companies
+        )
+        for company_name, results in regrouped_results.items()
+        for result in results
+    ]
+
+
+def regroup_positions(
+    positions: List[Position], companies: Optional[CompanyRegistry] = None
+) -> Dict[str, List[Position]]:
+    regrouped_positions = dict()
+
+    for position in positions:
+        if companies is not None:
+            companies.share(position=position)
+
+        company_name = position.company_name
+
+        if company_name not in regrouped_positions:
+            regrouped_positions[company_name] = list()
+
+        regrouped_positions[company_name].append(position)
+
+    return regrouped_positions
+
+
+def iterate_regrouped_dicts(
+    regrouped_positions: Dict[str, List[Position]],
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    for company_name, positions in regrouped_positions.items():
+        yield company_name, [
+            position.to_dict(include_company_name=False) for position in positions
+        ]
@@ -1,24 +1,62 @@
 import argparse
 import json
+import math
+import multiprocessing
 import os
 from pathlib import Path
 import regex
 import sys
-from typing import Tuple
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 import unidecode
 
+from ljetne_prakse.fetching.pages import prettify_page
+from ljetne_prakse.scraping.parsing import (
+    DEFAULT_PARSER,
+    PARSERS,
+    check_parser,
+    parse_page,
+)
 from ljetne_prakse.scraping.position_page import (
+    ANALYSIS_VERSION,
+    OVERFLOW_KEY,
     analyze_position_page_rows,
+    check_fields,
+    get_field_names,
+    get_normalization_cache_info,
     get_position_page_rows,
 )
+from ljetne_prakse.scraping.records import (
+    CompanyRegistry,
+    Position,
+    iterate_regrouped_dicts,
+    regroup_positions,
+)
+from ljetne_prakse.storage import sqlite
+from ljetne_prakse.storage.archive import PageArchive
+from ljetne_prakse.storage.blobs import get_blobs_path
+from ljetne_prakse.storage.cache import AnalysisCache, hash_page
+from ljetne_prakse.storage.jsonl import dump_groups, iterate_groups, write_record
+from ljetne_prakse.storage.snapshot import SNAPSHOT_SUFFIX, write_snapshot
 
 # from ljetne_prakse.utils.paths import DEFAULT_DATA_FOLDER
 
 DEFAULT_DATA_FOLDER = Path(__file__).resolve().parent.parent / "data"
 
+OUTPUT_FORMATS = ("json", "jsonl", "snapshot")
+
 NON_WORD_PATTERN = r"[^\w\s]+"
 WHITESPACE_PATTERN = r"\s+"
 
@@ -26,8 +64,31 @@ NON_WORD_REGEX = regex.compile(NON_WORD_PATTERN)
 WHITESPACE_REGEX = regex.compile(WHITESPACE_PATTERN)
 
 
-def get_arguments(args) -> Tuple[Path, Path, str, bool]:
-    if args.source_folder is None:
+class Arguments(NamedTuple):
+    source_folder: Path
+    source_archive: Optional[Path]
+    destination_folder: Path
+    results_name: str
+    save_separately: bool
+    n_workers: int
+    chunk_size: Optional[int]
+    html_parser: str
+    parse_root_only: bool
+    output_format: str
+    group_by_company: bool
+    cache_path: Optional[Path]
+    sqlite_path: Optional[Path]
+    snapshot_name: str
+    fields: Optional[FrozenSet[str]]
+
+
+def get_arguments(args) -> Arguments:
+    source_archive = None
+
+    if args.source_archive is not None:
+        source_archive = Path(args.source_archive)
+        source_folder = source_archive.parent
+    elif args.source_folder is None:
         root = DEFAULT_DATA_FOLDER
 
         folders = [root / folder_name for folder_name in os.listdir(root)]
@@ -42,18 +103,96 @@ def get_arguments(args) -> Tuple[Path, Path, str, bool]:
         folders = sorted(folders)
         most_recent_folder = folders[-1]
         source_folder = most_recent_folder / "position-pages"
+
+        if not os.path.isdir(source_folder):
+            archive_path = most_recent_folder / "position-pages.archive"
+
+            if os.path.isfile(archive_path):
+                source_archive = archive_path
+                source_folder = most_recent_folder
     else:
         source_folder = Path(args.source_folder)
 
     if args.destination_folder is None:
-        destination_folder = source_folder.parent / "analysis"
+        if source_archive is None:
+            destination_folder = source_folder.parent / "analysis"
+        else:
+            destination_folder = source_archive.parent / "analysis"
     else:
         destination_folder = Path(args.destination_folder)
 
     results_name = str(args.results_name).strip()
     save_separately = bool(args.save_separately)
 
-    return source_folder, destination_folder, results_name, save_separately
+    n_workers = args.workers
+    if n_workers is None or n_workers < 1:
+        n_workers = multiprocessing.cpu_count()
+    n_workers = int(n_workers)
+
+    chunk_size = args.chunk_size
+    if chunk_size is not None:
+        chunk_size = int(chunk_size)
+
+        if chunk_size < 1:
+            raise RuntimeError(f"Expected a chunk size of at least 1, got {chunk_size}")
+
+    html_parser = str(args.parser).strip()
+    check_parser(parser=html_parser)
+
+    parse_root_only = bool(args.parse_root_only)
+
+    output_format = str(args.output_format).strip().lower()
+
+    if output_format not in OUTPUT_FORMATS:
+        raise RuntimeError(
+            f"Unknown output format `{output_format}`, expected one of "
+            f"{OUTPUT_FORMATS}"
+        )
+
+    group_by_company = output_format != "jsonl" or bool(args.group_by_company)
+
+    if args.no_cache:
+        cache_path = None
+    elif args.cache_path is None:
+        cache_path = DEFAULT_DATA_FOLDER / "analysis-cache.sqlite3"
+    else:
+        cache_path = Path(args.cache_path)
+
+    sqlite_path = None if args.sqlite_path is None else Path(args.sqlite_path)
+
+    if args.snapshot_name is not None:
+        snapshot_name = str(args.snapshot_name).strip()
+    elif source_archive is not None:
+        snapshot_name = source_archive.parent.name
+    else:
+        snapshot_name = source_folder.parent.name
+
+    if args.fields is None:
+        fields = None
+    else:
+        fields = [str(field).strip() for field in args.fields]
+        check_fields(fields=fields)
+
+        # Results are always grouped by company name, so it can't be left out
+        fields = frozenset(fields) | {"company_name"}
+
+    return Arguments(
+        source_folder=source_folder,
+        source_archive=source_archive,
+        destination_folder=destination_folder,
+        results_name=results_name,
+        save_separately=save_separately,
+        n_workers=n_workers,
+        chunk_size=chunk_size,
+        html_parser=html_parser,
+        parse_root_only=parse_root_only,
+        output_format=output_format,
+        group_by_company=group_by_company,
+        cache_path=cache_path,
+        sqlite_path=sqlite_path,
+        snapshot_name=snapshot_name,
+        fields=fields,
+    )
 
 
 def normalize_for_file_name(text: str):
@@ -66,7 +205,332 @@ def normalize_for_file_name(text: str):
     return new_text
 
 
-def main():
+def get_file_paths(source_folder: Path):
+    file_paths = [source_folder / file_name for file_name in os.listdir(source_folder)]
+    file_paths = [
+        file_path
+        for file_path in file_paths
+        if os.path.isfile(file_path) and str(file_path).endswith(".html")
+    ]
+
+    return sorted(file_paths)
+
+
+def get_position_page_references(
+    source_folder: Path, source_archive: Optional[Path] = None
+) -> List[Union[Path, int]]:
+    if source_archive is None:
+        return get_file_paths(source_folder=source_folder)
+
+    with PageArchive(source_archive) as archive:
+        names = archive.get_names()
+
+        return sorted(range(len(archive)), key=lambda i: names[i])
+
+
+def read_position_pages(
+    references: List[Union[Path, int]], source_archive: Optional[Path] = None
+) -> Iterator[Tuple[str, str]]:
+    if source_archive is not None:
+        with PageArchive(source_archive) as archive:
+            names = archive.get_names()
+
+            for i in references:
+                yield f"{source_archive}:{names[i]}", archive.get_text(i)
+
+        return
+
+    for file_path in references:
+        with open(file_path, encoding="utf8", errors="replace") as f:
+            yield str(file_path), f.read()
+
+
+def analyze_position_page(
+    position_page: str,
+    source: str,
+    parser: str = DEFAULT_PARSER,
+    parse_root_only: bool = False,
+    fields: Optional[FrozenSet[str]] = None,
+) -> Optional[Position]:
+    soup = parse_page(page_text=position_page, parser=parser, only_root=parse_root_only)
+
+    if soup is None:
+        print(
+            f"WARNING: Couldn't parse position page in {source}, skipping",
+            file=sys.stderr,
+        )
+        return None
+
+    position_page_rows = get_position_page_rows(position_page=soup)
+
+    if position_page_rows is None or len(position_page_rows) == 0:
+        print(
+            f"WARNING: Couldn't parse position page rows in {source}, skipping",
+            file=sys.stderr,
+        )
+        return None
+
+    return analyze_position_page_rows(
+        position_page_rows=position_page_rows, fields=fields
+    )
+
+
+def get_analysis_version(
+    parser: str, parse_root_only: bool, fields: Optional[FrozenSet[str]] = None
+) -> str:
+    version = f"{ANALYSIS_VERSION}:{parser}:{'root' if parse_root_only else 'full'}"
+
+    if fields is not None:
+        version += ":" + ",".join(sorted(fields))
+
+    return version
+
+
+def has_raw_pages(
+    references: List[Union[Path, int]], source_archive: Optional[Path] = None
+) -> bool:
+    # Archives and blob snapshots keep pages as they were fetched, folders keep
+    # them prettified. Prettifying again changes nothing, so pages carried
+    # forward from a folder into either are fine too
+    if source_archive is not None:
+        return True
+
+    return len(references) != 0 and os.path.isfile(
+        get_blobs_path(pages_folder=Path(references[0]).parent)
+    )
+
+
+def analyze_referenced_position_pages(
+    references: List[Union[Path, int]],
+    source_archive: Optional[Path] = None,
+    parser: str = DEFAULT_PARSER,
+    parse_root_only: bool = False,
+    cache: Optional[AnalysisCache] = None,
+    fields: Optional[FrozenSet[str]] = None,
+) -> Iterator[Tuple[str, Optional[Position], bool]]:
+    version = get_analysis_version(
+        parser=parser, parse_root_only=parse_root_only, fields=fields
+    )
+    raw_pages = has_raw_pages(references=references, source_archive=source_archive)
+
+    for source, position_page in read_position_pages(
+        references=references, source_archive=source_archive
+    ):
+        page_hash = hash_page(page_text=position_page)
+
+        if cache is not None:
+            is_cached, result = cache.get(page_hash=page_hash, version=version)
+
+            if is_cached:
+                if result is not None:
+                    result = Position.from_dict(record=result)
+
+                yield page_hash, result, True
+                continue
+
+        # Raw pages are prettified like save_page does, so every storage gives
+        # the same results
+        if raw_pages:
+            position_page = prettify_page(page_text=position_page)
+
+        result = analyze_position_page(
+            position_page=position_page,
+            source=source,
+            parser=parser,
+            parse_root_only=parse_root_only,
+            fields=fields,
+        )
+
+        yield page_hash, result, False
+
+
+def analyze_position_page_chunk(
+    args,
+) -> List[Tuple[str, Optional[Position], bool]]:
+    references, source_archive, parser, parse_root_only, cache_path, fields = args
+
+    # Workers only read from the cache, the main process writes new analyses
+    cache = None if cache_path is None else AnalysisCache(path=cache_path)
+
+    try:
+        return list(
+            analyze_referenced_position_pages(
+                references=references,
+                source_archive=source_archive,
+                parser=parser,
+                parse_root_only=parse_root_only,
+                cache=cache,
+                fields=fields,
+            )
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def analyze_position_page_chunks(
+    chunks: List[Tuple], n_workers: int
+) -> Iterator[Tuple[str, Optional[Position], bool]]:
+    # imap keeps the chunk order, so the results come back in the same order as
+    # they would from the serial path
+    with multiprocessing.Pool(n_workers) as pool:
+        for chunk_analyses in pool.imap(analyze_position_page_chunk, chunks):
+            yield from chunk_analyses
+
+
+def analyze_position_pages(
+    references: List[Union[Path, int]],
+    source_archive: Optional[Path] = None,
+    n_workers: int = 1,
+    chunk_size: Optional[int] = None,
+    parser: str = DEFAULT_PARSER,
+    parse_root_only: bool = False,
+    cache: Optional[AnalysisCache] = None,
+    fields: Optional[FrozenSet[str]] = None,
+) -> Iterator[Optional[Position]]:
+    if n_workers == 1:
+        analyses = analyze_referenced_position_pages(
+            references=references,
+            source_archive=source_archive,
+            parser=parser,
+            parse_root_only=parse_root_only,
+            cache=cache,
+            fields=fields,
+        )
+    else:
+        if chunk_size is None:
+            # A few chunks per worker keeps them all busy without paying for
+            # a round trip per page
+            chunk_size = max(1, math.ceil(len(references) / (4 * n_workers)))
+
+        cache_path = None if cache is None else cache.path
+        chunks = [
+            (
+                references[i : i + chunk_size],
+                source_archive,
+                parser,
+                parse_root_only,
+                cache_path,
+                fields,
+            )
+            for i in range(0, len(references), chunk_size)
+        ]
+
+        analyses = analyze_position_page_chunks(chunks=chunks, n_workers=n_workers)
+
+    version = get_analysis_version(
+        parser=parser, parse_root_only=parse_root_only, fields=fields
+    )
+
+    try:
+        for page_hash, result, is_cached in analyses:
+            if cache is not None:
+                if is_cached:
+                    cache.n_hits += 1
+                else:
+                    cache.n_misses += 1
+                    cache.put(
+                        page_hash=page_hash,
+                        version=version,
+                        result=None if result is None else result.to_dict(),
+                    )
+
+            yield result
+    finally:
+        if cache is not None:
+            cache.commit()
+
+
+def finish_analysis(cache: Optional[AnalysisCache]):
+    # Workers keep their own normalization caches, so this is only filled in
+    # when analyzing serially
+    cache_info = get_normalization_cache_info()
+
+    if cache_info["hits"] + cache_info["misses"] != 0:
+        print(
+            f"Normalization cache: {cache_info['hits']} hits, "
+            f"{cache_info['misses']} misses"
+        )
+
+    if cache is not None:
+        print(f"Analysis cache: {cache.n_hits} hits, {cache.n_misses} misses")
+        cache.close()
+
+
+def save_results(
+    regrouped_results: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    destination_folder: Path,
+    results_name: str,
+    save_separately: bool,
+    output_format: str = "json",
+):
+    if not os.path.exists(destination_folder):
+        os.makedirs(destination_folder)
+
+    if output_format == "snapshot":
+        snapshot_path = destination_folder / Path(results_name).with_suffix(
+            SNAPSHOT_SUFFIX
+        )
+        n_companies = write_snapshot(
+            regrouped_results=regrouped_results, path=snapshot_path
+        )
+        print(f"Saved {n_companies} companies to {snapshot_path}")
+    elif save_separately:
+        destination_folder = destination_folder / "companies"
+
+        if not os.path.exists(destination_folder):
+            os.makedirs(destination_folder)
+
+        for company_name, results in tqdm(
+            regrouped_results, desc="Saving results", file=sys.stdout
+        ):
+            file_name = normalize_for_file_name(company_name) + ".json"
+
+            with open(
+                destination_folder / file_name,
+                mode="w+",
+                encoding="utf8",
+                errors="replace",
+            ) as f:
+                json.dump(
+                    results,
+                    f,
+                    skipkeys=False,
+                    ensure_ascii=False,
+                    indent=2,
+                    sort_keys=False,
+                )
+    else:
+        with open(
+            destination_folder / results_name,
+            mode="w+",
+            encoding="utf8",
+            errors="replace",
+        ) as f:
+            dump_groups(groups=regrouped_results, f=f)
+
+
+def export_results(
+    regrouped_results: Iterable[Tuple[str, List[Dict[str, Any]]]],
+    sqlite_path: Path,
+    snapshot_name: str,
+):
+    print(f"Exporting results to {sqlite_path} as snapshot `{snapshot_name}`")
+    connection = sqlite.connect(path=sqlite_path)
+
+    try:
+        n_positions = sqlite.export_snapshot(
+            connection=connection,
+            snapshot_name=snapshot_name,
+            regrouped_results=regrouped_results,
+        )
+    finally:
+        connection.close()
+
+    print(f"Exported {n_positions} positions")
+
+
+def main(argv: Optional[List[str]] = None):
     # region Parsing
     parser = argparse.ArgumentParser()
 
@@ -78,6 +542,17 @@ def main():
         help="A str representing the folder where the position page HTMLs are located",
     )
 
+    parser.add_argument(
+        "--source_archive",
+        "-a",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to a position page archive created by "
+            "`get_pages.py --storage archive` (overrides --source_folder)"
+        ),
+    )
+
     parser.add_argument(
         "--destination_folder",
         "-f",
@@ -103,115 +578,223 @@ def main():
         help="A flag; if set, results will be saved separately for each company.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help=(
+            "The number of processes analyzing position pages in parallel. -1 is for "
+            "the number of cores"
+        ),
+    )
 
-    # region endregion
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=None,
+        help=(
+            "The number of position pages sent to a worker at once (only used if "
+            "--workers is not 1). Defaults to a quarter of a worker's share of pages"
+        ),
+    )
 
-    source_folder, destination_folder, results_name, save_separately = get_arguments(
-        args=args
+    parser.add_argument(
+        "--parser",
+        "-p",
+        type=str,
+        default=DEFAULT_PARSER,
+        choices=PARSERS,
+        help="A str representing the BeautifulSoup parser used on position pages.",
     )
 
-    print("Getting file paths")
-    file_paths = [source_folder / file_name for file_name in os.listdir(source_folder)]
-    file_paths = [
-        file_path
-        for file_path in file_paths
-        if os.path.isfile(file_path) and str(file_path).endswith(".html")
-    ]
+    parser.add_argument(
+        "--parse_root_only",
+        action="store_true",
+        help=(
+            "A flag; if set, only the practice subtree of each position page will be "
+            "parsed."
+        ),
+    )
 
-    print("Sorting file paths")
-    file_paths = sorted(file_paths)
+    parser.add_argument(
+        "--output_format",
+        "-o",
+        type=str,
+        default="json",
+        choices=OUTPUT_FORMATS,
+        help=(
+            "A str representing the output format. jsonl streams one position per "
+            "line to a .jsonl file next to the results file while pages are "
+            "analyzed, snapshot saves the results as a single indexed binary file "
+            "that can be read one company at a time"
+        ),
+    )
 
-    if len(file_paths) == 0:
-        raise RuntimeError(f"Couldn't find position pages in {source_folder}")
+    parser.add_argument(
+        "--group_by_company",
+        action="store_true",
+        help=(
+            "A flag; if set with --output_format jsonl, the JSON Lines file will "
+            "afterwards be grouped by company into the usual results."
+        ),
+    )
 
-    print("Reading position pages")
-    results = list()
+    parser.add_argument(
+        "--cache_path",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the SQLite cache of analyzed position "
+            "pages, keyed by page content and analysis version."
+        ),
+    )
 
-    for file_path in tqdm(file_paths, desc="Analyzing position pages", file=sys.stdout):
-        with open(file_path, encoding="utf8", errors="replace") as f:
-            position_page = f.read()
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="A flag; if set, every position page will be analyzed from scratch.",
+    )
 
-        soup = BeautifulSoup(position_page, "html.parser")
+    parser.add_argument(
+        "--sqlite_path",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to an SQLite database the results will "
+            "additionally be exported to."
+        ),
+    )
 
-        if soup is None:
-            print(
-                f"WARNING: Couldn't parse position page in {file_path}, skipping",
-                file=sys.stderr,
-            )
-            continue
+    parser.add_argument(
+        "--snapshot_name",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the snapshot name used in the SQLite export. "
+            "Defaults to the name of the scraped data folder"
+        ),
+    )
+
+    parser.add_argument(
+        "--fields",
+        nargs="+",
+        type=str,
+        default=None,
+        help=(
+            "The position fields to extract, the analyzers of the rest are skipped. "
+            f"company_name is always kept. Choose from {', '.join(get_field_names())} "
+            f"and {OVERFLOW_KEY} for rows with unknown labels. Defaults to all of them"
+        ),
+    )
 
-        position_page_rows = get_position_page_rows(position_page=soup)
+    args = parser.parse_args(args=argv)
 
-        if position_page_rows is None or len(position_page_rows) == 0:
-            print(
-                f"WARNING: Couldn't parse position page rows in {file_path}, skipping",
-                file=sys.stderr,
-            )
-            continue
+    # region endregion
 
-        result = analyze_position_page_rows(position_page_rows=position_page_rows)
+    arguments = get_arguments(args=args)
 
-        if result is not None:
-            results.append(result)
+    print("Getting position pages")
+    references = get_position_page_references(
+        source_folder=arguments.source_folder, source_archive=arguments.source_archive
+    )
 
-    print("Regrouping position pages")
-    regrouped_results = dict()
+    if len(references) == 0:
+        source = (
+            arguments.source_folder
+            if arguments.source_archive is None
+            else arguments.source_archive
+        )
+        raise RuntimeError(f"Couldn't find position pages in {source}")
+
+    if not os.path.exists(arguments.destination_folder):
+        os.makedirs(arguments.destination_folder)
+
+    cache = (
+        None
+        if arguments.cache_path is None
+        else AnalysisCache(path=arguments.cache_path)
+    )
 
-    for result in results:
-        company_name = result["company_name"]
+    analyzed_results = tqdm(
+        analyze_position_pages(
+            references=references,
+            source_archive=arguments.source_archive,
+            n_workers=arguments.n_workers,
+            chunk_size=arguments.chunk_size,
+            parser=arguments.html_parser,
+            parse_root_only=arguments.parse_root_only,
+            cache=cache,
+            fields=arguments.fields,
+        ),
+        desc="Analyzing position pages",
+        file=sys.stdout,
+        total=len(references),
+    )
 
-        if company_name not in regrouped_results:
-            regrouped_results[company_name] = list()
+    if arguments.output_format == "jsonl":
+        jsonl_name = Path(arguments.results_name).with_suffix(".jsonl")
+        jsonl_path = arguments.destination_folder / jsonl_name
+
+        print(f"Streaming position pages to {jsonl_path}")
+        with open(jsonl_path, mode="w+", encoding="utf8", errors="replace") as f:
+            for result in analyzed_results:
+                if result is not None:
+                    write_record(f=f, record=result.to_dict())
+
+        finish_analysis(cache=cache)
+
+        if arguments.group_by_company:
+            print("Regrouping and saving results")
+            save_results(
+                regrouped_results=iterate_groups(path=jsonl_path, key="company_name"),
+                destination_folder=arguments.destination_folder,
+                results_name=arguments.results_name,
+                save_separately=arguments.save_separately,
+            )
 
-        del result["company_name"]
+        if arguments.sqlite_path is not None:
+            export_results(
+                regrouped_results=iterate_groups(path=jsonl_path, key="company_name"),
+                sqlite_path=arguments.sqlite_path,
+                snapshot_name=arguments.snapshot_name,
+            )
 
-        regrouped_results[company_name].append(result)
+        return
 
-    print("Saving results")
-    if not os.path.exists(destination_folder):
-        os.makedirs(destination_folder)
+    print("Reading position pages")
+    results = list()
 
-    if save_separately:
-        destination_folder = destination_folder / "companies"
+    for result in analyzed_results:
+        if result is not None:
+            results.append(result)
 
-        if not os.path.exists(destination_folder):
-            os.makedirs(destination_folder)
+    finish_analysis(cache=cache)
 
-        for company_name, results in tqdm(
-            regrouped_results.items(), desc="Saving results", file=sys.stdout
-        ):
-            file_name = normalize_for_file_name(company_name) + ".json"
+    print("Regrouping position pages")
+    regrouped_positions = regroup_positions(
+        positions=results, companies=CompanyRegistry()
+    )
 
-            with open(
-                destination_folder / file_name,
-                mode="w+",
-                encoding="utf8",
-                errors="replace",
-            ) as f:
-                json.dump(
-                    results,
-                    f,
-                    skipkeys=False,
-                    ensure_ascii=False,
-                    indent=2,
-                    sort_keys=False,
-                )
-    else:
-        with open(
-            destination_folder / results_name,
-            mode="w+",
-            encoding="utf8",
-            errors="replace",
-        ) as f:
-            json.dump(
-                regrouped_results,
-                f,
-                skipkeys=False,
-                ensure_ascii=False,
-                indent=2,
-                sort_keys=False,
-            )
+    print("Saving results")
+    save_results(
+        regrouped_results=iterate_regrouped_dicts(
+            regrouped_positions=regrouped_positions
+        ),
+        destination_folder=arguments.destination_folder,
+        results_name=arguments.results_name,
+        save_separately=arguments.save_separately,
+        output_format=arguments.output_format,
+    )
+
+    if arguments.sqlite_path is not None:
+        export_results(
+            regrouped_results=iterate_regrouped_dicts(
+                regrouped_positions=regrouped_positions
+            ),
+            sqlite_path=arguments.sqlite_path,
+            snapshot_name=arguments.snapshot_name,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ljetne_prakse.cli import COMMANDS
+
+
+def get_arguments(args) -> Tuple[List[str], int, Optional[float]]:
+    commands = list(COMMANDS) if args.commands is None else list(args.commands)
+
+    for command in commands:
+        if command not in COMMANDS:
+            raise RuntimeError(
+                f"Unknown command `{command}`, expected one of {tuple(COMMANDS)}"
+            )
+
+    n_repeats = int(args.repeats)
+
+    if n_repeats < 1:
+        raise RuntimeError(f"Expected at least 1 repeat, got {n_repeats}")
+
+    max_ms = None if args.max_ms is None else float(args.max_ms)
+
+    return commands, n_repeats, max_ms
+
+
+def time_command(arguments: List[str], n_repeats: int) -> float:
+    timings = list()
+
+    for _ in range(n_repeats):
+        start_time = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *arguments],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        timings.append(time.perf_counter() - start_time)
+
+    return statistics.median(timings) * 1000
+
+
+def benchmark_commands(commands: List[str], n_repeats: int) -> Dict[str, float]:
+    # Every run is a fresh interpreter, so imports are always cold
+    timings = {
+        "python": time_command(arguments=["-c", "pass"], n_repeats=n_repeats),
+        "ljetne-prakse --help": time_command(
+            arguments=["-m", "ljetne_prakse", "--help"], n_repeats=n_repeats
+        ),
+    }
+
+    for command in commands:
+        timings[f"ljetne-prakse {command} --help"] = time_command(
+            arguments=["-m", "ljetne_prakse", command, "--help"], n_repeats=n_repeats
+        )
+
+    return timings
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description=(
+            "Measures how long `ljetne-prakse` and its commands take to start, to "
+            "catch slow imports."
+        )
+    )
+
+    parser.add_argument(
+        "--commands",
+        nargs="+",
+        type=str,
+        default=None,
+        help="The commands to measure. Defaults to all of them",
+    )
+
+    parser.add_argument(
+        "--repeats",
+        "-n",
+        type=int,
+        default=5,
+        help="The number of times each command is started, the median is reported.",
+    )
+
+    parser.add_argument(
+        "--max_ms",
+        type=float,
+        default=None,
+        help=(
+            "The most milliseconds `ljetne-prakse --help` may take on top of the "
+            "interpreter starting; if exceeded, the script exits with an error."
+        ),
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    commands, n_repeats, max_ms = get_arguments(args=args)
+
+    timings = benchmark_commands(commands=commands, n_repeats=n_repeats)
+    width = max(len(name) for name in timings)
+    interpreter_ms = timings["python"]
+
+    for name, ms in timings.items():
+        overhead = "" if name == "python" else f" (+{ms - interpreter_ms:.1f} ms)"
+        print(f"{name:<{width}}  {ms:8.1f} ms{overhead}")
+
+    if max_ms is not None:
+        overhead_ms = timings["ljetne-prakse --help"] - interpreter_ms
+
+        if overhead_ms > max_ms:
+            print(
+                f"ERROR: `ljetne-prakse --help` took {overhead_ms:.1f} ms on top of "
+                f"the interpreter, expected at most {max_ms:.1f} ms",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+from pathlib import Path
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from tqdm import tqdm
+
+from ljetne_prakse.scraping.parsing import DEFAULT_PARSER, PARSERS, check_parser
+from ljetne_prakse.scraping.position_page import normalize_label, normalize_markdown
+from ljetne_prakse.scripts.analyze_position_pages import (
+    analyze_position_page,
+    get_position_page_references,
+    read_position_pages,
+)
+
+
+def get_arguments(args) -> Tuple[Path, Optional[Path], str, bool]:
+    if args.source_archive is not None:
+        source_archive = Path(args.source_archive)
+        source_folder = source_archive.parent
+    elif args.source_folder is not None:
+        source_archive = None
+        source_folder = Path(args.source_folder)
+    else:
+        raise RuntimeError("Expected either --source_folder or --source_archive")
+
+    html_parser = str(args.parser).strip()
+    check_parser(parser=html_parser)
+
+    parse_root_only = bool(args.parse_root_only)
+
+    return source_folder, source_archive, html_parser, parse_root_only
+
+
+def clear_caches():
+    # Otherwise whichever parser runs second finds the normalized text cached
+    normalize_markdown.cache_clear()
+    normalize_label.cache_clear()
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description=(
+            "Checks that a parser engine produces the same analysis as the default "
+            "full-document html.parser path."
+        )
+    )
+
+    parser.add_argument(
+        "--source_folder",
+        "-s",
+        type=str,
+        default=None,
+        help="A str representing the folder where the position page HTMLs are located",
+    )
+
+    parser.add_argument(
+        "--source_archive",
+        "-a",
+        type=str,
+        default=None,
+        help="A str representing the path to a position page archive",
+    )
+
+    parser.add_argument(
+        "--parser",
+        "-p",
+        type=str,
+        default="lxml",
+        choices=PARSERS,
+        help="A str representing the BeautifulSoup parser to compare.",
+    )
+
+    parser.add_argument(
+        "--parse_root_only",
+        action="store_true",
+        help=(
+            "A flag; if set, the compared parser will only parse the practice "
+            "subtree."
+        ),
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    source_folder, source_archive, html_parser, parse_root_only = get_arguments(
+        args=args
+    )
+
+    references = get_position_page_references(
+        source_folder=source_folder, source_archive=source_archive
+    )
+
+    if len(references) == 0:
+        source = source_folder if source_archive is None else source_archive
+        raise RuntimeError(f"Couldn't find position pages in {source}")
+
+    reference_time = 0.0
+    candidate_time = 0.0
+    n_mismatches = 0
+
+    for source, position_page in tqdm(
+        read_position_pages(references=references, source_archive=source_archive),
+        desc="Comparing parsers",
+        file=sys.stdout,
+        total=len(references),
+    ):
+        clear_caches()
+        start_time = time.perf_counter()
+        expected = analyze_position_page(
+            position_page=position_page, source=source, parser=DEFAULT_PARSER
+        )
+        reference_time += time.perf_counter() - start_time
+
+        clear_caches()
+        start_time = time.perf_counter()
+        result = analyze_position_page(
+            position_page=position_page,
+            source=source,
+            parser=html_parser,
+            parse_root_only=parse_root_only,
+        )
+        candidate_time += time.perf_counter() - start_time
+
+        expected = None if expected is None else expected.to_dict()
+        result = None if result is None else result.to_dict()
+
+        if result == expected:
+            continue
+
+        n_mismatches += 1
+
+        if result is None or expected is None:
+            print(
+                f"MISMATCH: {source} was only analyzed by one parser", file=sys.stderr
+            )
+            continue
+
+        for key in sorted(set(expected) | set(result)):
+            if expected.get(key) != result.get(key):
+                print(
+                    f"MISMATCH: {source} differs in `{key}`:\n"
+                    f"  {DEFAULT_PARSER}: {expected.get(key)!r}\n"
+                    f"  {html_parser}: {result.get(key)!r}",
+                    file=sys.stderr,
+                )
+
+    print(
+        f"{len(references) - n_mismatches}/{len(references)} position pages match\n"
+        f"{DEFAULT_PARSER}: {reference_time:.2f}s\n"
+        f"{html_parser}{' (root only)' if parse_root_only else ''}: "
+        f"{candidate_time:.2f}s"
+    )
+
+    if n_mismatches != 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
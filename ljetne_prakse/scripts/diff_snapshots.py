@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+from pathlib import Path
+import sys
+from typing import Any, List, Optional, Tuple
+
+from ljetne_prakse.analysis.diff import diff_records, load_records
+
+OUTPUT_FORMATS = ("text", "json")
+
+MAX_VALUE_LENGTH = 80
+DIFF_CONTEXT_LENGTH = 20
+
+
+def get_arguments(args) -> Tuple[Path, Path, str, Optional[Path]]:
+    old_snapshot = Path(args.old_snapshot)
+    new_snapshot = Path(args.new_snapshot)
+
+    output_format = str(args.output_format).strip().lower()
+
+    if output_format not in OUTPUT_FORMATS:
+        raise RuntimeError(
+            f"Unknown output format `{output_format}`, expected one of "
+            f"{OUTPUT_FORMATS}"
+        )
+
+    output_path = None if args.output_path is None else Path(args.output_path)
+
+    return old_snapshot, new_snapshot, output_format, output_path
+
+
+def format_value(value: Any, start: int = 0) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+
+    if start > 0:
+        text = "..." + text[start:][3:]
+
+    if len(text) > MAX_VALUE_LENGTH:
+        text = text[: MAX_VALUE_LENGTH - 3] + "..."
+
+    return text
+
+
+def format_change(old_value: Any, new_value: Any) -> Tuple[str, str]:
+    old_text = json.dumps(old_value, ensure_ascii=False)
+    new_text = json.dumps(new_value, ensure_ascii=False)
+
+    # Long values are shown from a bit before their first difference, so cutting
+    # them doesn't hide what changed
+    n_common = len(os.path.commonprefix((old_text, new_text)))
+    start = n_common - DIFF_CONTEXT_LENGTH
+
+    # Cutting less than the ellipsis takes wouldn't save anything
+    if start <= 3:
+        start = 0
+
+    return (
+        format_value(value=old_value, start=start),
+        format_value(value=new_value, start=start),
+    )
+
+
+def format_diff(diff) -> str:
+    lines = list()
+
+    for title, key in (("Added", "added"), ("Removed", "removed")):
+        lines.append(f"{title} ({len(diff[key])}):")
+
+        for record in diff[key]:
+            lines.append(f"  {record['company_name']}: {record.get('position_title')}")
+
+        lines.append("")
+
+    lines.append(f"Changed ({len(diff['changed'])}):")
+
+    for change in diff["changed"]:
+        lines.append(f"  {change['company_name']}: {change['position_title']}")
+
+        for key, (old_value, new_value) in change["changes"].items():
+            old_text, new_text = format_change(old_value=old_value, new_value=new_value)
+            lines.append(f"    {key}: {old_text} -> {new_text}")
+
+    lines.append("")
+    lines.append(f"Unchanged: {diff['n_unchanged']}")
+
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description="Reports positions added, removed or changed between snapshots."
+    )
+
+    parser.add_argument(
+        "old_snapshot",
+        type=str,
+        help=(
+            "A str representing the older snapshot folder (e.g. "
+            "exports/20210521-174435) or its results.json."
+        ),
+    )
+
+    parser.add_argument(
+        "new_snapshot",
+        type=str,
+        help="A str representing the newer snapshot folder or its results.json.",
+    )
+
+    parser.add_argument(
+        "--output_format",
+        "-o",
+        type=str,
+        default="text",
+        choices=OUTPUT_FORMATS,
+        help="A str representing the format of the report.",
+    )
+
+    parser.add_argument(
+        "--output_path",
+        type=str,
+        default=None,
+        help="A str representing the file the report is saved to instead of stdout.",
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    old_snapshot, new_snapshot, output_format, output_path = get_arguments(args=args)
+
+    diff = diff_records(
+        old_records=load_records(path=old_snapshot),
+        new_records=load_records(path=new_snapshot),
+    )
+
+    if output_format == "json":
+        report = json.dumps(diff, ensure_ascii=False, indent=2)
+    else:
+        report = format_diff(diff=diff)
+
+    if output_path is None:
+        print(report)
+    else:
+        with open(output_path, mode="w+", encoding="utf8", errors="replace") as f:
+            f.write(report + "\n")
+
+        print(
+            f"Added: {len(diff['added'])}, removed: {len(diff['removed'])}, "
+            f"changed: {len(diff['changed'])}, unchanged: {diff['n_unchanged']}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,29 @@
 import argparse
-from getpass import getpass
 import multiprocessing
 from pathlib import Path
 import os
 import sys
-import traceback
-from typing import Tuple
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
 
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
-from ljetne_prakse.scraping.auth import login_to_fer
+from ljetne_prakse.fetching.journal import CrawlJournal, load_completed_urls
+from ljetne_prakse.fetching.listing import (
+    LISTING_FIELDS,
+    LISTING_NAME,
+    SnapshotPages,
+    find_previous_snapshot,
+    get_unchanged_urls,
+    load_listing,
+    save_listing,
+)
+from ljetne_prakse.fetching.manifest import load_manifest, save_manifest
+from ljetne_prakse.fetching.rate_limit import AIMDController
+from ljetne_prakse.scraping.auth import get_fer_session
+from ljetne_prakse.storage.archive import PageArchiveWriter
+from ljetne_prakse.storage.blobs import BlobStore, SnapshotBlobs
 from ljetne_prakse.scraping.main_page import get_main_page_rows, analyze_main_page_rows
 
 # from ljetne_prakse.utils.paths import DEFAULT_DATA_FOLDER
@@ -18,11 +31,38 @@ from ljetne_prakse.utils.time import get_timestamp
 
 DEFAULT_DATA_FOLDER = Path(__file__).resolve().parent.parent / "data"
 
-
-def get_arguments(args) -> Tuple[str, Path, Path, Path, int]:
+BACKENDS = ("multiprocessing", "threads", "asyncio")
+STORAGES = ("folder", "archive", "blobs")
+
+
+class Arguments(NamedTuple):
+    url: str
+    destination_folder: Path
+    main_page_path: Path
+    secondary_pages_folder: Path
+    n_processes: int
+    backend: str
+    n_concurrent: int
+    manifest_path: Path
+    ignore_manifest: bool
+    storage: str
+    resume: bool
+    max_retries: int
+    adaptive: bool
+    cookies_path: Optional[Path]
+    incremental: bool
+    previous_folder: Optional[Path]
+    blob_folder: Path
+
+
+def get_arguments(args) -> Arguments:
     url = str(args.url).strip()
 
-    if args.destination_folder is None:
+    resume = args.resume is not None
+
+    if resume:
+        destination_folder = Path(args.resume)
+    elif args.destination_folder is None:
         destination_folder = Path(DEFAULT_DATA_FOLDER / get_timestamp())
     else:
         destination_folder = Path(args.destination_folder)
@@ -30,6 +70,9 @@ def get_arguments(args) -> Tuple[str, Path, Path, Path, int]:
     main_page_name = str(args.main_page_name).strip()
     main_page_path = destination_folder / main_page_name
 
+    if resume and not os.path.isfile(main_page_path):
+        raise RuntimeError(f"Can't resume, couldn't find {main_page_path}")
+
     secondary_pages_folder_name = str(args.secondary_pages_folder_name)
     secondary_pages_folder = destination_folder / secondary_pages_folder_name
 
@@ -38,31 +81,220 @@ def get_arguments(args) -> Tuple[str, Path, Path, Path, int]:
         n_processes = multiprocessing.cpu_count()
     n_processes = int(n_processes)
 
-    return url, destination_folder, main_page_path, secondary_pages_folder, n_processes
+    backend = str(args.backend).strip().lower()
+
+    if backend not in BACKENDS:
+        raise RuntimeError(f"Unknown backend `{backend}`, expected one of {BACKENDS}")
+
+    n_concurrent = int(args.n_concurrent)
+
+    if n_concurrent < 1:
+        raise RuntimeError(
+            f"Expected at least 1 concurrent request, got {n_concurrent}"
+        )
+
+    if args.manifest_path is None:
+        manifest_path = DEFAULT_DATA_FOLDER / "manifest.json"
+    else:
+        manifest_path = Path(args.manifest_path)
+
+    ignore_manifest = bool(args.ignore_manifest)
+
+    storage = str(args.storage).strip().lower()
+
+    if storage not in STORAGES:
+        raise RuntimeError(f"Unknown storage `{storage}`, expected one of {STORAGES}")
+
+    max_retries = int(args.max_retries)
+
+    if max_retries < 0:
+        raise RuntimeError(
+            f"Expected a non-negative number of retries, got {max_retries}"
+        )
+
+    adaptive = bool(args.adaptive)
+
+    if adaptive and backend == "multiprocessing":
+        raise RuntimeError("--adaptive needs the threads or asyncio backend")
+
+    previous_folder = None
+
+    if args.previous_folder is not None:
+        previous_folder = Path(args.previous_folder)
+
+        if not os.path.isfile(previous_folder / LISTING_NAME):
+            raise RuntimeError(
+                f"Couldn't find a main page listing in {previous_folder}"
+            )
 
+    incremental = bool(args.incremental) or previous_folder is not None
 
-def process_page(args):
-    session, href, destination = args
+    if args.blob_folder is None:
+        blob_folder = DEFAULT_DATA_FOLDER / ".blobs"
+    else:
+        blob_folder = Path(args.blob_folder)
+
+    if args.no_saved_cookies:
+        cookies_path = None
+    elif args.cookies_path is None:
+        cookies_path = DEFAULT_DATA_FOLDER / "session-cookies.json"
+    else:
+        cookies_path = Path(args.cookies_path)
+
+    return Arguments(
+        url=url,
+        destination_folder=destination_folder,
+        main_page_path=main_page_path,
+        secondary_pages_folder=secondary_pages_folder,
+        n_processes=n_processes,
+        backend=backend,
+        n_concurrent=n_concurrent,
+        manifest_path=manifest_path,
+        ignore_manifest=ignore_manifest,
+        storage=storage,
+        resume=resume,
+        max_retries=max_retries,
+        adaptive=adaptive,
+        cookies_path=cookies_path,
+        incremental=incremental,
+        previous_folder=previous_folder,
+        blob_folder=blob_folder,
+    )
+
+
+def fetch_main_page(session, url: str, main_page_path: Path) -> Optional[BeautifulSoup]:
+    print("Getting main page...")
+    main_page = session.get(url)
+
+    if main_page is None or main_page.status_code != 200:
+        print(f"WARNING: Couldn't fetch `{url}`", file=sys.stderr)
+        return None
+
+    print("Parsing main page")
+    soup = BeautifulSoup(main_page.text, "html.parser")
+    soup_text = soup.prettify()
 
-    # Timeout is useless, FER throttles requests
-    position_page = session.get(href)
+    print("Saving main page")
+    with open(main_page_path, mode="w+", encoding="utf8", errors="replace") as f:
+        f.write(str(soup_text).strip())
 
-    if position_page is None or position_page.status_code != 200:
-        print(f"WARNING: Couldn't fetch `{href}`, skipping")
-        return
+    return soup
 
-    page_text = BeautifulSoup(position_page.text, "html.parser").prettify()
 
-    with open(
-        destination,
-        mode="w+",
-        encoding="utf8",
-        errors="replace",
-    ) as f:
-        f.write(page_text)
+def get_position_rows(main_page: BeautifulSoup) -> List[Dict[str, Any]]:
+    main_page_rows = get_main_page_rows(main_page=main_page)
+    print(f"Found {len(main_page_rows)} main page rows")
+    parsed_rows = analyze_main_page_rows(main_page_rows=main_page_rows)
 
+    return [row for row in parsed_rows if row is not None and "url" in row]
 
-def main():
+
+def get_position_href(row: Dict[str, Any]) -> str:
+    return f"https://www.fer.unizg.hr{row['url']}"
+
+
+def get_position_hrefs(main_page: BeautifulSoup) -> List[str]:
+    return [get_position_href(row=row) for row in get_position_rows(main_page)]
+
+
+def carry_forward_pages(
+    previous_folder: Path,
+    listing: Dict[str, Dict[str, Any]],
+    hrefs: List[str],
+    secondary_pages_folder: Path,
+    journal: CrawlJournal,
+    manifest: Dict[str, Dict[str, Any]],
+    archive: Optional[PageArchiveWriter] = None,
+    blobs: Optional[SnapshotBlobs] = None,
+) -> List[str]:
+    previous_listing = load_listing(path=previous_folder / LISTING_NAME)
+    unchanged_urls = get_unchanged_urls(
+        previous_listing=previous_listing, listing=listing
+    )
+
+    remaining_hrefs = list()
+
+    with SnapshotPages(
+        snapshot_folder=previous_folder,
+        pages_folder_name=secondary_pages_folder.name,
+    ) as previous_pages:
+        for href in hrefs:
+            name = listing[href]["name"]
+            destination = None if archive is not None else secondary_pages_folder / name
+
+            if href in unchanged_urls and previous_pages.copy_page(
+                previous_name=previous_listing[href]["name"],
+                name=name,
+                url=href,
+                destination=destination,
+                archive=archive,
+            ):
+                if blobs is not None:
+                    blobs.add_file(name=name, url=href, source=destination)
+                elif destination is not None and href in manifest:
+                    manifest[href]["path"] = str(destination)
+
+                journal.record(url=href, name=name)
+            else:
+                remaining_hrefs.append(href)
+
+    return remaining_hrefs
+
+
+def fetch_position_pages(
+    backend: str,
+    session,
+    hrefs: List[str],
+    destinations: List[Optional[Path]],
+    n_processes: int,
+    n_concurrent: int,
+    entries: Optional[List[Optional[Dict[str, Any]]]] = None,
+    callback: Optional[Callable[[str, Optional[Dict[str, Any]]], None]] = None,
+    max_retries: int = 0,
+    controller: Optional[AIMDController] = None,
+):
+    # Only the chosen backend is imported, aiohttp alone is slow to load
+    if backend == "asyncio":
+        from ljetne_prakse.fetching.asynchronous import fetch_pages_asyncio
+
+        fetch_pages_asyncio(
+            session=session,
+            hrefs=hrefs,
+            destinations=destinations,
+            n_concurrent=n_concurrent,
+            entries=entries,
+            callback=callback,
+            max_retries=max_retries,
+            controller=controller,
+        )
+    elif backend == "threads":
+        from ljetne_prakse.fetching.threads import fetch_pages_threads
+
+        fetch_pages_threads(
+            session=session,
+            hrefs=hrefs,
+            destinations=destinations,
+            n_threads=n_concurrent,
+            entries=entries,
+            callback=callback,
+            max_retries=max_retries,
+            controller=controller,
+        )
+    else:
+        from ljetne_prakse.fetching.processes import fetch_pages_multiprocessing
+
+        fetch_pages_multiprocessing(
+            session=session,
+            hrefs=hrefs,
+            destinations=destinations,
+            n_processes=n_processes,
+            entries=entries,
+            callback=callback,
+            max_retries=max_retries,
+        )
+
+
+def main(argv: Optional[List[str]] = None):
     # region Parsing
     parser = argparse.ArgumentParser()
 
@@ -109,78 +341,356 @@ def main():
         ),
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--backend",
+        "-b",
+        type=str,
+        default="multiprocessing",
+        choices=BACKENDS,
+        help="A str representing the engine used to fetch position pages.",
+    )
+
+    parser.add_argument(
+        "--n_concurrent",
+        "-c",
+        type=int,
+        default=8,
+        help=(
+            "The number of concurrent requests while fetching sites (only used by the "
+            "threads and asyncio backends)."
+        ),
+    )
+
+    parser.add_argument(
+        "--manifest_path",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the manifest of previously fetched pages, "
+            "used to skip unchanged pages."
+        ),
+    )
+
+    parser.add_argument(
+        "--ignore_manifest",
+        action="store_true",
+        help="A flag; if set, all position pages will be fetched unconditionally.",
+    )
+
+    parser.add_argument(
+        "--storage",
+        type=str,
+        default="folder",
+        choices=STORAGES,
+        help=(
+            "A str representing how position pages are stored: as prettified HTML "
+            "files in the secondary pages folder, as raw responses in a single "
+            "compressed archive next to it, or as raw responses in a blob store "
+            "shared by all snapshots and hard-linked into the secondary pages "
+            "folder. Raw pages are prettified when analyzed."
+        ),
+    )
+
+    parser.add_argument(
+        "--resume",
+        "-r",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the folder of an interrupted crawl. Its saved main "
+            "page is reused and only position pages missing from its journal are "
+            "fetched (overrides --destination_folder)."
+        ),
+    )
+
+    parser.add_argument(
+        "--max_retries",
+        type=int,
+        default=3,
+        help=(
+            "The number of times a position page is retried with jittered exponential "
+            "backoff after a 429, a 5xx or a connection error."
+        ),
+    )
+
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help=(
+            "A flag; if set, the number of concurrent requests will grow while "
+            "latency stays healthy and back off on throttling, up to --n_concurrent "
+            "(only used by the threads and asyncio backends)."
+        ),
+    )
+
+    parser.add_argument(
+        "--blob_folder",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the blob store used by --storage blobs. "
+            "Defaults to .blobs in the data folder"
+        ),
+    )
+
+    parser.add_argument(
+        "--incremental",
+        "-i",
+        action="store_true",
+        help=(
+            "A flag; if set, only position pages that are new or changed on the main "
+            "page since the previous snapshot are fetched, the rest are carried "
+            "forward from it."
+        ),
+    )
+
+    parser.add_argument(
+        "--previous_folder",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the snapshot an incremental crawl is "
+            "compared to. Implies --incremental. Defaults to the most recent "
+            "snapshot before the destination folder"
+        ),
+    )
+
+    parser.add_argument(
+        "--cookies_path",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the file session cookies are kept in "
+            "between runs. Defaults to session-cookies.json in the data folder"
+        ),
+    )
+
+    parser.add_argument(
+        "--no_saved_cookies",
+        action="store_true",
+        help=(
+            "A flag; if set, saved session cookies won't be used or saved and you "
+            "will always be asked to log in."
+        ),
+    )
+
+    args = parser.parse_args(args=argv)
 
     # endregion
 
-    (
-        url,
-        destination_folder,
-        main_page_path,
-        secondary_pages_folder,
-        n_processes,
-    ) = get_arguments(args=args)
+    arguments = get_arguments(args=args)
+    previous_folder = arguments.previous_folder
     print(
-        f"URL: {url}\n"
-        f"Destination HTML path: {main_page_path}\n"
-        f"Secondary pages folder: {secondary_pages_folder}\n"
-        f"Number of processes: {n_processes}\n"
+        f"URL: {arguments.url}\n"
+        f"Destination HTML path: {arguments.main_page_path}\n"
+        f"Secondary pages folder: {arguments.secondary_pages_folder}\n"
+        f"Backend: {arguments.backend}\n"
+        f"Number of processes: {arguments.n_processes}\n"
+        f"Number of concurrent requests: {arguments.n_concurrent}\n"
+        f"Manifest path: {arguments.manifest_path}\n"
+        f"Storage: {arguments.storage}\n"
+        f"Resuming: {arguments.resume}\n"
+        f"Maximum retries: {arguments.max_retries}\n"
+        f"Adaptive concurrency: {arguments.adaptive}\n"
+        f"Cookies path: {arguments.cookies_path}\n"
+        f"Incremental: {arguments.incremental}\n"
     )
 
-    while True:
-        try:
-            username = input("Username: ")
-            password = getpass("Password: ")
-
-            session = login_to_fer(username=username, password=password)
-            break
-        except RuntimeError:
-            print(f"Login failed because: {traceback.format_exc()}", file=sys.stderr)
+    session, username = get_fer_session(cookies_path=arguments.cookies_path)
 
     print(f"\nSuccessfully logged in as {username}!\n")
 
-    if not os.path.exists(destination_folder):
-        os.makedirs(destination_folder)
+    if not os.path.exists(arguments.destination_folder):
+        os.makedirs(arguments.destination_folder)
 
-    print("Getting main page...")
-    main_page = session.get(url)
+    if arguments.resume:
+        print("Reading saved main page")
+        with open(arguments.main_page_path, encoding="utf8", errors="replace") as f:
+            soup = BeautifulSoup(f.read(), "html.parser")
+    else:
+        soup = fetch_main_page(
+            session=session, url=arguments.url, main_page_path=arguments.main_page_path
+        )
+
+        if soup is None:
+            return
+
+    print("Analyzing main page")
+    position_rows = get_position_rows(main_page=soup)
+    all_hrefs = [get_position_href(row=row) for row in position_rows]
+    page_names = {href: f"page-{i}.html" for i, href in enumerate(all_hrefs)}
+
+    # Kept with every snapshot, so the next incremental crawl can compare to it
+    listing = {
+        href: {
+            **{field: row.get(field) for field in LISTING_FIELDS},
+            "name": page_names[href],
+        }
+        for href, row in zip(all_hrefs, position_rows)
+    }
+    save_listing(listing=listing, path=arguments.destination_folder / LISTING_NAME)
+
+    if arguments.incremental and previous_folder is None:
+        previous_folder = find_previous_snapshot(
+            snapshot_folder=arguments.destination_folder
+        )
+
+        if previous_folder is None:
+            print(
+                "WARNING: Couldn't find a previous snapshot, fetching all position "
+                "pages",
+                file=sys.stderr,
+            )
+
+    journal_path = arguments.destination_folder / "journal.jsonl"
+    archive_path = arguments.secondary_pages_folder.with_name(
+        arguments.secondary_pages_folder.name + ".archive"
+    )
 
-    if main_page is not None and main_page.status_code == 200:
-        print("Parsing main page")
-        soup = BeautifulSoup(main_page.text, "html.parser")
-        soup_text = soup.prettify()
-
-        print("Saving main page")
-        with open(main_page_path, mode="w+", encoding="utf8", errors="replace") as f:
-            f.write(str(soup_text).strip())
-
-        print("Analyzing main pagye")
-        main_page_rows = get_main_page_rows(main_page=soup)
-        print(f"Found {len(main_page_rows)} main page rows")
-        parsed_rows = analyze_main_page_rows(main_page_rows=main_page_rows)
-        hrefs = [
-            f"https://www.fer.unizg.hr{row['url']}"
-            for row in parsed_rows
-            if row is not None and "url" in row
+    if arguments.resume:
+        completed_urls = load_completed_urls(path=journal_path)
+
+        # Pages in a folder could have been deleted since they were recorded
+        if arguments.storage != "archive":
+            completed_urls = {
+                href
+                for href in completed_urls
+                if href in page_names
+                and os.path.isfile(arguments.secondary_pages_folder / page_names[href])
+            }
+    else:
+        completed_urls = set()
+
+    hrefs = [href for href in all_hrefs if href not in completed_urls]
+    print(f"{len(all_hrefs) - len(hrefs)} position pages were already fetched")
+
+    manifest = load_manifest(path=arguments.manifest_path)
+    journal = CrawlJournal(path=journal_path, append=arguments.resume)
+
+    archive = None
+    blobs = None
+
+    if arguments.storage == "archive":
+        archive = PageArchiveWriter(path=archive_path, append=arguments.resume)
+    elif arguments.storage == "blobs":
+        blobs = SnapshotBlobs(
+            store=BlobStore(root=arguments.blob_folder),
+            pages_folder=arguments.secondary_pages_folder,
+        )
+    elif not os.path.exists(arguments.secondary_pages_folder):
+        os.makedirs(arguments.secondary_pages_folder)
+
+    if arguments.incremental and previous_folder is not None:
+        n_hrefs = len(hrefs)
+        hrefs = carry_forward_pages(
+            previous_folder=previous_folder,
+            listing=listing,
+            hrefs=hrefs,
+            secondary_pages_folder=arguments.secondary_pages_folder,
+            journal=journal,
+            manifest=manifest,
+            archive=archive,
+            blobs=blobs,
+        )
+        print(
+            f"{n_hrefs - len(hrefs)} unchanged position pages were carried forward "
+            f"from {previous_folder}"
+        )
+
+    if arguments.storage != "folder":
+        destinations = [None] * len(hrefs)
+        # There are no previous raw bodies to fall back on after a 304
+        entries = None
+    else:
+        destinations = [
+            arguments.secondary_pages_folder / page_names[href] for href in hrefs
+        ]
+        entries = [
+            None if arguments.ignore_manifest else manifest.get(href) for href in hrefs
         ]
 
-        print("Saving position pages")
-        if not os.path.exists(secondary_pages_folder):
-            os.makedirs(secondary_pages_folder)
+    print("Saving position pages")
+    iterator = tqdm(
+        range(len(hrefs)), desc="Processing pages", file=sys.stdout, ncols=80
+    )
 
-        iterator = tqdm(
-            range(len(hrefs)), desc="Processing pages", file=sys.stdout, ncols=80
+    if arguments.adaptive:
+        controller = AIMDController(
+            initial_limit=min(4, arguments.n_concurrent),
+            max_limit=arguments.n_concurrent,
         )
-        with multiprocessing.Pool(n_processes) as pool:
-            sessions = [session] * len(hrefs)
-            destinations = [
-                secondary_pages_folder / f"page-{i}.html" for i in range(len(hrefs))
-            ]
-
-            for _ in pool.imap_unordered(
-                process_page, iterable=zip(sessions, hrefs, destinations)
+    else:
+        controller = None
+
+    n_unchanged = 0
+
+    def on_page(href: str, entry: Optional[Dict[str, Any]]):
+        nonlocal n_unchanged
+
+        if entry is not None:
+            response = entry.pop("response", None)
+
+            if archive is not None and response is not None:
+                archive.append(name=page_names[href], url=href, **response)
+
+            # Blobs keep the raw response, analysis prettifies it like save_page
+            if blobs is not None and response is not None:
+                blobs.add_page(name=page_names[href], url=href, page=response["body"])
+
+            previous_entry = manifest.get(href)
+
+            if (
+                previous_entry is not None
+                and previous_entry.get("sha256") == entry["sha256"]
             ):
-                iterator.update()
+                n_unchanged += 1
+
+            manifest[href] = entry
+            journal.record(url=href, name=page_names[href])
+
+        iterator.update()
+
+    start_time = time.perf_counter()
+
+    try:
+        fetch_position_pages(
+            backend=arguments.backend,
+            session=session,
+            hrefs=hrefs,
+            destinations=destinations,
+            n_processes=arguments.n_processes,
+            n_concurrent=arguments.n_concurrent,
+            entries=entries,
+            callback=on_page,
+            max_retries=arguments.max_retries,
+            controller=controller,
+        )
+    finally:
+        save_manifest(manifest=manifest, path=arguments.manifest_path)
+        journal.close()
+
+        if archive is not None:
+            archive.close()
+
+        if blobs is not None:
+            blobs.save()
+
+    iterator.close()
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Fetched {len(hrefs)} position pages in {elapsed:.2f}s "
+        f"({len(hrefs) / max(elapsed, 1e-9):.2f} pages/s), "
+        f"{n_unchanged} unchanged since the last run"
+    )
+
+    if blobs is not None:
+        print(
+            f"Blob store: {blobs.store.n_written} blobs written, "
+            f"{blobs.store.n_reused} reused"
+        )
+
+    if controller is not None:
+        print(f"Final concurrency limit: {controller.limit:.2f}")
 
 
 if __name__ == "__main__":
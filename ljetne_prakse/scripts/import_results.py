@@ -0,0 +1,104 @@
+import argparse
+import os
+from pathlib import Path
+import sys
+from typing import List, Optional, Tuple
+
+from tqdm import tqdm
+
+from ljetne_prakse.storage import sqlite
+
+DEFAULT_EXPORTS_FOLDER = Path(__file__).resolve().parent.parent.parent / "exports"
+
+
+def get_arguments(args) -> Tuple[List[Path], Path, Optional[str]]:
+    if len(args.results_paths) == 0:
+        root = DEFAULT_EXPORTS_FOLDER
+
+        if not os.path.isdir(root):
+            raise RuntimeError(f"Couldn't find exports in {root}")
+
+        results_paths = list()
+
+        for folder_name in sorted(os.listdir(root)):
+            for file_name in ("results.json", "results.snapshot"):
+                path = root / folder_name / "analysis" / file_name
+
+                if os.path.isfile(path):
+                    results_paths.append(path)
+                    break
+    else:
+        results_paths = [Path(path) for path in args.results_paths]
+
+    if len(results_paths) == 0:
+        raise RuntimeError("Couldn't find any results to import")
+
+    database_path = Path(args.database_path)
+
+    snapshot_name = args.snapshot_name
+    if snapshot_name is not None:
+        if len(results_paths) != 1:
+            raise RuntimeError("--snapshot_name can only be used with a single file")
+
+        snapshot_name = str(snapshot_name).strip()
+
+    return results_paths, database_path, snapshot_name
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description="Imports analysis results.json files into an SQLite database."
+    )
+
+    parser.add_argument(
+        "results_paths",
+        type=str,
+        nargs="*",
+        help=(
+            "Paths to results.json or results.snapshot files. Defaults to every "
+            "exports/<snapshot>/analysis/results.json"
+        ),
+    )
+
+    parser.add_argument(
+        "--database_path",
+        "-d",
+        type=str,
+        default="ljetne-prakse.sqlite3",
+        help="A str representing the path to the SQLite database.",
+    )
+
+    parser.add_argument(
+        "--snapshot_name",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the snapshot name of a single imported file. "
+            "Defaults to the name of the folder containing `analysis`"
+        ),
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    results_paths, database_path, snapshot_name = get_arguments(args=args)
+
+    connection = sqlite.connect(path=database_path)
+
+    try:
+        for results_path in tqdm(results_paths, desc="Importing", file=sys.stdout):
+            sqlite.import_results_file(
+                connection=connection, path=results_path, snapshot_name=snapshot_name
+            )
+
+        snapshot_names = sqlite.get_snapshot_names(connection=connection)
+    finally:
+        connection.close()
+
+    print(f"{database_path} now contains snapshots: {', '.join(snapshot_names)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,517 @@
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, TextIO, Union
+
+from tqdm import tqdm
+
+from ljetne_prakse.fetching.asynchronous import create_client, fetch_page
+from ljetne_prakse.fetching.rate_limit import AIMDController, AsyncLimiter
+from ljetne_prakse.scraping.auth import get_fer_session
+from ljetne_prakse.scraping.parsing import (
+    DEFAULT_PARSER,
+    PARSERS,
+    check_parser,
+)
+from ljetne_prakse.scraping.records import Position
+from ljetne_prakse.scripts.analyze_position_pages import (
+    analyze_position_page,
+    save_results,
+)
+from ljetne_prakse.scripts.get_pages import fetch_main_page, get_position_hrefs
+from ljetne_prakse.storage.archive import PageArchiveWriter, decode_body
+from ljetne_prakse.storage.jsonl import iterate_groups, write_record
+from ljetne_prakse.utils.time import get_timestamp
+
+# from ljetne_prakse.utils.paths import DEFAULT_DATA_FOLDER
+
+DEFAULT_DATA_FOLDER = Path(__file__).resolve().parent.parent / "data"
+
+
+class OrderedRecordWriter:
+    # Pages finish in any order, but records are written in page name order (the
+    # order analyze_position_pages.py reads a folder in) as soon as all earlier
+    # pages are done, so records come in the same order as with the two-step
+    # process
+    def __init__(self, f: TextIO, names: List[str]):
+        self.f = f
+        self.names = sorted(names)
+
+        self.n_written = 0
+        self._next = 0
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = dict()
+
+    def add(self, name: str, result: Optional[Dict[str, Any]]):
+        self._pending[name] = result
+
+        while self._next < len(self.names) and self.names[self._next] in self._pending:
+            result = self._pending.pop(self.names[self._next])
+            self._next += 1
+
+            if result is not None:
+                write_record(f=self.f, record=result)
+                self.n_written += 1
+
+        self.f.flush()
+
+
+class Arguments(NamedTuple):
+    url: str
+    destination_folder: Path
+    main_page_path: Path
+    n_concurrent: int
+    adaptive: bool
+    max_retries: int
+    n_workers: int
+    queue_size: int
+    html_parser: str
+    parse_root_only: bool
+    archive: bool
+    results_name: str
+    group_by_company: bool
+    cookies_path: Optional[Path]
+
+
+def get_arguments(args) -> Arguments:
+    url = str(args.url).strip()
+
+    if args.destination_folder is None:
+        destination_folder = Path(DEFAULT_DATA_FOLDER / get_timestamp())
+    else:
+        destination_folder = Path(args.destination_folder)
+
+    main_page_path = destination_folder / str(args.main_page_name).strip()
+
+    n_concurrent = int(args.n_concurrent)
+
+    if n_concurrent < 1:
+        raise RuntimeError(
+            f"Expected at least 1 concurrent request, got {n_concurrent}"
+        )
+
+    adaptive = bool(args.adaptive)
+
+    max_retries = int(args.max_retries)
+
+    if max_retries < 0:
+        raise RuntimeError(
+            f"Expected a non-negative number of retries, got {max_retries}"
+        )
+
+    n_workers = args.workers
+    if n_workers is None or n_workers < 1:
+        n_workers = multiprocessing.cpu_count()
+    n_workers = int(n_workers)
+
+    queue_size = int(args.queue_size)
+
+    if queue_size < 1:
+        raise RuntimeError(f"Expected a queue size of at least 1, got {queue_size}")
+
+    html_parser = str(args.parser).strip()
+    check_parser(parser=html_parser)
+
+    parse_root_only = bool(args.parse_root_only)
+    archive = bool(args.archive)
+    results_name = str(args.results_name).strip()
+    group_by_company = bool(args.group_by_company)
+
+    if args.no_saved_cookies:
+        cookies_path = None
+    elif args.cookies_path is None:
+        cookies_path = DEFAULT_DATA_FOLDER / "session-cookies.json"
+    else:
+        cookies_path = Path(args.cookies_path)
+
+    return Arguments(
+        url=url,
+        destination_folder=destination_folder,
+        main_page_path=main_page_path,
+        n_concurrent=n_concurrent,
+        adaptive=adaptive,
+        max_retries=max_retries,
+        n_workers=n_workers,
+        queue_size=queue_size,
+        html_parser=html_parser,
+        parse_root_only=parse_root_only,
+        archive=archive,
+        results_name=results_name,
+        group_by_company=group_by_company,
+        cookies_path=cookies_path,
+    )
+
+
+def analyze_response(
+    body: bytes,
+    headers: Dict[str, str],
+    href: str,
+    parser: str = DEFAULT_PARSER,
+    parse_root_only: bool = False,
+) -> Optional[Position]:
+    # The raw page is analyzed as is, prettifying it first would parse it twice.
+    # Text split by inline tags (e.g. Dev<i>eloper</i>) can therefore differ in
+    # whitespace from what the two-step process gets from prettified files
+    return analyze_position_page(
+        position_page=decode_body(body=body, headers=headers),
+        source=href,
+        parser=parser,
+        parse_root_only=parse_root_only,
+    )
+
+
+async def run_pipeline(
+    session,
+    hrefs: List[str],
+    page_names: Dict[str, str],
+    writer: OrderedRecordWriter,
+    executor: ProcessPoolExecutor,
+    n_concurrent: int,
+    n_workers: int,
+    queue_size: int,
+    max_retries: int = 0,
+    controller: Optional[AIMDController] = None,
+    parser: str = DEFAULT_PARSER,
+    parse_root_only: bool = False,
+    archive: Optional[PageArchiveWriter] = None,
+    callback: Optional[Callable[[], None]] = None,
+):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+
+    if controller is None:
+        limiter: Union[asyncio.Semaphore, AsyncLimiter] = asyncio.Semaphore(
+            n_concurrent
+        )
+    else:
+        limiter = AsyncLimiter(controller=controller)
+
+    # Fetched pages waiting for a free spot in the queue count against the same
+    # budget, so memory stays bounded however far fetching gets ahead of parsing
+    fetch_slots = asyncio.Semaphore(n_concurrent + queue_size)
+
+    async def produce(client, href: str):
+        async with fetch_slots:
+            _, entry = await fetch_page(
+                client=client,
+                limiter=limiter,
+                href=href,
+                destination=None,
+                max_retries=max_retries,
+            )
+
+            if entry is None:
+                await queue.put((href, None))
+                return
+
+            response = entry["response"]
+
+            if archive is not None:
+                archive.append(name=page_names[href], url=href, **response)
+
+            await queue.put((href, response))
+
+    async def consume():
+        while True:
+            item = await queue.get()
+
+            if item is None:
+                return
+
+            href, response = item
+
+            result = None
+
+            # A page that fails to analyze still has to reach the writer, or every
+            # later record would wait for it forever
+            if response is not None:
+                try:
+                    result = await loop.run_in_executor(
+                        executor,
+                        analyze_response,
+                        response["body"],
+                        response["headers"],
+                        href,
+                        parser,
+                        parse_root_only,
+                    )
+                except Exception as e:
+                    print(
+                        f"WARNING: Couldn't analyze position page `{href}` because "
+                        f"of {e!r}, skipping",
+                        file=sys.stderr,
+                    )
+
+            writer.add(
+                name=page_names[href],
+                result=None if result is None else result.to_dict(),
+            )
+
+            if callback is not None:
+                callback()
+
+    consumers = [asyncio.ensure_future(consume()) for _ in range(n_workers)]
+
+    async with create_client(session=session, n_concurrent=n_concurrent) as client:
+        await asyncio.gather(*(produce(client=client, href=href) for href in hrefs))
+
+    for _ in consumers:
+        await queue.put(None)
+
+    await asyncio.gather(*consumers)
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description=(
+            "Fetches and analyzes position pages in one go, parsing pages while the "
+            "rest are still being fetched. Pages are analyzed raw rather than "
+            "prettified, so whitespace around inline tags can differ from the "
+            "two-step process."
+        )
+    )
+
+    parser.add_argument(
+        "--url",
+        "-u",
+        type=str,
+        default="https://www.fer.unizg.hr/prakse/prijava",
+        help="A str representing the URL of the main practice page.",
+    )
+
+    parser.add_argument(
+        "--destination_folder",
+        "-f",
+        type=str,
+        default=None,
+        help="A str representing the path to the destination folder.",
+    )
+
+    parser.add_argument(
+        "--main_page_name",
+        "-m",
+        type=str,
+        default="main.html",
+        help="A str representing the file name of the main page file.",
+    )
+
+    parser.add_argument(
+        "--n_concurrent",
+        "-c",
+        type=int,
+        default=8,
+        help="The number of concurrent requests while fetching sites.",
+    )
+
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help=(
+            "A flag; if set, the number of concurrent requests will adapt to the "
+            "server, up to --n_concurrent."
+        ),
+    )
+
+    parser.add_argument(
+        "--max_retries",
+        type=int,
+        default=3,
+        help="The number of times a throttled or failed position page is retried.",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=-1,
+        help=(
+            "The number of processes analyzing position pages. -1 is for the number "
+            "of cores"
+        ),
+    )
+
+    parser.add_argument(
+        "--queue_size",
+        "-q",
+        type=int,
+        default=32,
+        help="The number of fetched position pages that can wait to be analyzed.",
+    )
+
+    parser.add_argument(
+        "--parser",
+        "-p",
+        type=str,
+        default=DEFAULT_PARSER,
+        choices=PARSERS,
+        help="A str representing the BeautifulSoup parser used on position pages.",
+    )
+
+    parser.add_argument(
+        "--parse_root_only",
+        action="store_true",
+        help=(
+            "A flag; if set, only the practice subtree of each position page will be "
+            "parsed."
+        ),
+    )
+
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help=(
+            "A flag; if set, raw position pages will also be saved to "
+            "position-pages.archive in the destination folder."
+        ),
+    )
+
+    parser.add_argument(
+        "--results_name",
+        "-r",
+        type=str,
+        default="results.json",
+        help=(
+            "A str representing the file name of the grouped results. Positions are "
+            "streamed to a .jsonl file with the same name"
+        ),
+    )
+
+    parser.add_argument(
+        "--group_by_company",
+        action="store_true",
+        help=(
+            "A flag; if set, the streamed positions will afterwards be grouped by "
+            "company into the usual results."
+        ),
+    )
+
+    parser.add_argument(
+        "--cookies_path",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the file session cookies are kept in "
+            "between runs. Defaults to session-cookies.json in the data folder"
+        ),
+    )
+
+    parser.add_argument(
+        "--no_saved_cookies",
+        action="store_true",
+        help=(
+            "A flag; if set, saved session cookies won't be used or saved and you "
+            "will always be asked to log in."
+        ),
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    arguments = get_arguments(args=args)
+    print(
+        f"URL: {arguments.url}\n"
+        f"Destination folder: {arguments.destination_folder}\n"
+        f"Number of concurrent requests: {arguments.n_concurrent}\n"
+        f"Adaptive concurrency: {arguments.adaptive}\n"
+        f"Number of workers: {arguments.n_workers}\n"
+        f"Queue size: {arguments.queue_size}\n"
+        f"Archiving pages: {arguments.archive}\n"
+        f"Cookies path: {arguments.cookies_path}\n"
+    )
+
+    session, username = get_fer_session(cookies_path=arguments.cookies_path)
+
+    print(f"\nSuccessfully logged in as {username}!\n")
+
+    analysis_folder = arguments.destination_folder / "analysis"
+
+    if not os.path.exists(analysis_folder):
+        os.makedirs(analysis_folder)
+
+    soup = fetch_main_page(
+        session=session, url=arguments.url, main_page_path=arguments.main_page_path
+    )
+
+    if soup is None:
+        return
+
+    print("Analyzing main page")
+    hrefs = get_position_hrefs(main_page=soup)
+    page_names = {href: f"page-{i}.html" for i, href in enumerate(hrefs)}
+
+    if arguments.adaptive:
+        controller = AIMDController(
+            initial_limit=min(4, arguments.n_concurrent),
+            max_limit=arguments.n_concurrent,
+        )
+    else:
+        controller = None
+
+    if arguments.archive:
+        page_archive = PageArchiveWriter(
+            path=arguments.destination_folder / "position-pages.archive"
+        )
+    else:
+        page_archive = None
+
+    jsonl_path = analysis_folder / Path(arguments.results_name).with_suffix(".jsonl")
+    iterator = tqdm(
+        range(len(hrefs)), desc="Processing pages", file=sys.stdout, ncols=80
+    )
+
+    print(f"Streaming position pages to {jsonl_path}")
+    start_time = time.perf_counter()
+
+    try:
+        with open(
+            jsonl_path, mode="w+", encoding="utf8", errors="replace"
+        ) as f, ProcessPoolExecutor(max_workers=arguments.n_workers) as executor:
+            writer = OrderedRecordWriter(f=f, names=list(page_names.values()))
+
+            asyncio.run(
+                run_pipeline(
+                    session=session,
+                    hrefs=hrefs,
+                    page_names=page_names,
+                    writer=writer,
+                    executor=executor,
+                    n_concurrent=arguments.n_concurrent,
+                    n_workers=arguments.n_workers,
+                    queue_size=arguments.queue_size,
+                    max_retries=arguments.max_retries,
+                    controller=controller,
+                    parser=arguments.html_parser,
+                    parse_root_only=arguments.parse_root_only,
+                    archive=page_archive,
+                    callback=iterator.update,
+                )
+            )
+    finally:
+        if page_archive is not None:
+            page_archive.close()
+
+    iterator.close()
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Fetched and analyzed {len(hrefs)} position pages in {elapsed:.2f}s, "
+        f"{writer.n_written} positions saved"
+    )
+
+    if arguments.group_by_company:
+        print("Regrouping and saving results")
+        save_results(
+            regrouped_results=iterate_groups(path=jsonl_path, key="company_name"),
+            destination_folder=analysis_folder,
+            results_name=arguments.results_name,
+            save_separately=False,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ljetne_prakse.analysis.companies import (
+    DEFAULT_MAX_BLOCK_SIZE,
+    DEFAULT_THRESHOLD,
+    CompanyResolver,
+)
+from ljetne_prakse.analysis.diff import get_results_path, get_snapshot_name
+from ljetne_prakse.storage import sqlite
+from ljetne_prakse.storage.snapshot import load_results
+
+# from ljetne_prakse.utils.paths import DEFAULT_DATA_FOLDER
+
+DEFAULT_DATA_FOLDER = Path(__file__).resolve().parent.parent / "data"
+
+OUTPUT_FORMATS = ("text", "json")
+
+
+def get_arguments(
+    args,
+) -> Tuple[List[Path], Optional[Path], Optional[Path], Optional[Path], float, int, str]:
+    results_paths = [get_results_path(path=path) for path in args.snapshots]
+
+    database_path = None
+
+    if args.database_path is not None:
+        database_path = Path(args.database_path)
+
+        if not database_path.is_file():
+            raise RuntimeError(f"Couldn't find a database in {database_path}")
+
+    if len(results_paths) == 0 and database_path is None:
+        raise RuntimeError("Expected snapshots or a database to read")
+
+    if args.no_registry:
+        registry_path = None
+    elif args.registry_path is None:
+        registry_path = DEFAULT_DATA_FOLDER / "companies.json"
+    else:
+        registry_path = Path(args.registry_path)
+
+    output_path = None if args.output_path is None else Path(args.output_path)
+
+    threshold = float(args.threshold)
+
+    if not 0 < threshold <= 1:
+        raise RuntimeError(f"Expected a threshold in (0, 1], got {threshold}")
+
+    max_block_size = int(args.max_block_size)
+
+    if max_block_size < 1:
+        raise RuntimeError(f"Expected a positive block size, got {max_block_size}")
+
+    output_format = str(args.output_format).strip().lower()
+
+    if output_format not in OUTPUT_FORMATS:
+        raise RuntimeError(
+            f"Unknown output format `{output_format}`, expected one of "
+            f"{OUTPUT_FORMATS}"
+        )
+
+    return (
+        results_paths,
+        database_path,
+        registry_path,
+        output_path,
+        threshold,
+        max_block_size,
+        output_format,
+    )
+
+
+def format_summary(
+    resolver: CompanyResolver,
+    ids_by_snapshot: Dict[str, Dict[str, int]],
+    n_known: int,
+) -> str:
+    lines = [
+        f"Snapshots: {', '.join(ids_by_snapshot)}",
+        f"Companies: {len(resolver)} ({len(resolver) - n_known} new)",
+        f"Compared {resolver.n_compared} name pairs",
+    ]
+
+    merged = [identity for identity in resolver.identities if len(identity.names) > 1]
+
+    if len(merged) != 0:
+        lines.append("")
+        lines.append("Companies seen under several names:")
+
+        for identity in merged:
+            lines.append(f"  {identity.id:5d}  {' | '.join(identity.names)}")
+
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description=(
+            "Assigns stable IDs to companies across snapshots, so a company keeps its "
+            "ID when its name or website changes slightly. IDs are kept in a registry "
+            "and never change once given out."
+        )
+    )
+
+    parser.add_argument(
+        "snapshots",
+        type=str,
+        nargs="*",
+        help=(
+            "Snapshot folders (e.g. exports/20210521-174435), results.json or "
+            "results.snapshot files."
+        ),
+    )
+
+    parser.add_argument(
+        "--database_path",
+        "-d",
+        type=str,
+        default=None,
+        help="A str representing the path to an SQLite database to add snapshots from.",
+    )
+
+    parser.add_argument(
+        "--registry_path",
+        "-r",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the company registry. Defaults to "
+            "companies.json in the data folder"
+        ),
+    )
+
+    parser.add_argument(
+        "--no_registry",
+        action="store_true",
+        help="A flag; if set, no registry will be loaded or saved.",
+    )
+
+    parser.add_argument(
+        "--output_path",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to a JSON file the company IDs of every "
+            "snapshot will be saved to."
+        ),
+    )
+
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="The name similarity needed to consider two companies the same.",
+    )
+
+    parser.add_argument(
+        "--max_block_size",
+        type=int,
+        default=DEFAULT_MAX_BLOCK_SIZE,
+        help="The number of companies above which a blocking key is ignored.",
+    )
+
+    parser.add_argument(
+        "--output_format",
+        "-o",
+        type=str,
+        default="text",
+        choices=OUTPUT_FORMATS,
+        help="A str representing the format of the summary.",
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    (
+        results_paths,
+        database_path,
+        registry_path,
+        output_path,
+        threshold,
+        max_block_size,
+        output_format,
+    ) = get_arguments(args=args)
+
+    if registry_path is not None and os.path.isfile(registry_path):
+        resolver = CompanyResolver.load(
+            path=registry_path, threshold=threshold, max_block_size=max_block_size
+        )
+    else:
+        resolver = CompanyResolver(threshold=threshold, max_block_size=max_block_size)
+
+    n_known = len(resolver)
+    ids_by_snapshot: Dict[str, Dict[str, int]] = dict()
+
+    for results_path in results_paths:
+        ids_by_snapshot[get_snapshot_name(results_path=results_path)] = (
+            resolver.resolve_snapshot(
+                regrouped_results=load_results(path=results_path).items()
+            )
+        )
+
+    if database_path is not None:
+        connection = sqlite.connect(path=database_path)
+
+        try:
+            for snapshot_name in sqlite.get_snapshot_names(connection=connection):
+                ids_by_snapshot[snapshot_name] = resolver.resolve_snapshot(
+                    regrouped_results=sqlite.load_snapshot(
+                        connection=connection, snapshot_name=snapshot_name
+                    ).items()
+                )
+        finally:
+            connection.close()
+
+    if registry_path is not None:
+        resolver.save(path=registry_path)
+
+    if output_path is not None:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(output_path, mode="w+", encoding="utf8") as f:
+            json.dump(ids_by_snapshot, f, ensure_ascii=False, indent=2)
+
+    if output_format == "json":
+        summary: Dict[str, Any] = {
+            "n_companies": len(resolver),
+            "n_new": len(resolver) - n_known,
+            "n_compared": resolver.n_compared,
+            "companies": [identity.to_dict() for identity in resolver.identities],
+        }
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print(
+            format_summary(
+                resolver=resolver, ids_by_snapshot=ids_by_snapshot, n_known=n_known
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+from pathlib import Path
+import time
+from typing import List, Optional, Tuple
+
+from ljetne_prakse.storage import sqlite
+from ljetne_prakse.storage.search import search_positions
+
+
+def get_arguments(args) -> Tuple[str, Path, int, Optional[str], bool]:
+    query = str(args.query).strip()
+
+    if len(query) == 0:
+        raise RuntimeError("Expected a non-empty query")
+
+    database_path = Path(args.database_path)
+
+    if not database_path.is_file():
+        raise RuntimeError(
+            f"Couldn't find a database in {database_path}. Make sure you run "
+            "`import_results.py` or `analyze_position_pages.py --sqlite_path` first."
+        )
+
+    limit = int(args.limit)
+
+    if limit < 1:
+        raise RuntimeError(f"Expected a limit of at least 1, got {limit}")
+
+    snapshot_name = args.snapshot_name
+    if snapshot_name is not None:
+        snapshot_name = str(snapshot_name).strip()
+
+    raw = bool(args.raw)
+
+    return query, database_path, limit, snapshot_name, raw
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description="Searches position titles, descriptions and competences."
+    )
+
+    parser.add_argument(
+        "query",
+        type=str,
+        help="A str representing the words to look for, accents are ignored.",
+    )
+
+    parser.add_argument(
+        "--database_path",
+        "-d",
+        type=str,
+        default="ljetne-prakse.sqlite3",
+        help="A str representing the path to the SQLite database.",
+    )
+
+    parser.add_argument(
+        "--limit",
+        "-l",
+        type=int,
+        default=20,
+        help="The maximum number of positions to show.",
+    )
+
+    parser.add_argument(
+        "--snapshot_name",
+        type=str,
+        default=None,
+        help="A str representing the only snapshot to search in.",
+    )
+
+    parser.add_argument(
+        "--raw",
+        action="store_true",
+        help="A flag; if set, the query will be passed to SQLite FTS5 as is.",
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    query, database_path, limit, snapshot_name, raw = get_arguments(args=args)
+
+    connection = sqlite.connect(path=database_path)
+
+    try:
+        start_time = time.perf_counter()
+        results = search_positions(
+            connection=connection,
+            query=query,
+            limit=limit,
+            snapshot_name=snapshot_name,
+            raw=raw,
+        )
+        elapsed = time.perf_counter() - start_time
+    finally:
+        connection.close()
+
+    for result in results:
+        print(
+            f"{result['score']:7.2f}  {result['snapshot']}  "
+            f"{result['company_name']}: {result['position_title']}"
+        )
+
+    print(f"\nFound {len(results)} positions in {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ljetne_prakse.analysis.columns import SnapshotAnalytics
+from ljetne_prakse.analysis.diff import get_results_path, get_snapshot_name
+from ljetne_prakse.storage import sqlite
+from ljetne_prakse.storage.snapshot import load_results
+
+# from ljetne_prakse.utils.paths import DEFAULT_DATA_FOLDER
+
+DEFAULT_DATA_FOLDER = Path(__file__).resolve().parent.parent / "data"
+
+OUTPUT_FORMATS = ("text", "json")
+
+
+def get_arguments(
+    args,
+) -> Tuple[List[Path], Optional[Path], Optional[Path], str, int]:
+    results_paths = [get_results_path(path=path) for path in args.snapshots]
+
+    database_path = None
+
+    if args.database_path is not None:
+        database_path = Path(args.database_path)
+
+        if not database_path.is_file():
+            raise RuntimeError(f"Couldn't find a database in {database_path}")
+
+    if args.no_state:
+        state_path = None
+    elif args.state_path is None:
+        state_path = DEFAULT_DATA_FOLDER / "analytics.npz"
+    else:
+        state_path = Path(args.state_path)
+
+    if len(results_paths) == 0 and database_path is None and state_path is None:
+        raise RuntimeError("Expected snapshots, a database or a saved state to read")
+
+    output_format = str(args.output_format).strip().lower()
+
+    if output_format not in OUTPUT_FORMATS:
+        raise RuntimeError(
+            f"Unknown output format `{output_format}`, expected one of "
+            f"{OUTPUT_FORMATS}"
+        )
+
+    n_top = int(args.top)
+
+    return results_paths, database_path, state_path, output_format, n_top
+
+
+def get_file_version(path: Path) -> str:
+    stat = os.stat(path)
+
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def format_summary(summary: Dict[str, Any], n_top: int) -> str:
+    lines = [
+        f"Snapshots: {', '.join(summary['snapshots'])}",
+        f"Positions: {summary['n_positions']}",
+        f"Spots: {summary['n_spots']}",
+        "",
+        f"Top {n_top} companies by spots:",
+    ]
+
+    for company_name, n_spots in list(summary["spots_by_company"].items())[:n_top]:
+        n_positions = summary["positions_by_company"][company_name]
+        lines.append(
+            f"  {n_spots:5d} spots, {n_positions:4d} positions  {company_name}"
+        )
+
+    for title, key in (
+        ("Planned start by month", "planned_start_by_month"),
+        ("Planned end by month", "planned_end_by_month"),
+    ):
+        lines.append("")
+        lines.append(f"{title}:")
+
+        for month, count in summary[key].items():
+            lines.append(f"  {month}: {count}")
+
+    lines.append("")
+    lines.append("Duration in weeks:")
+
+    for n_weeks, count in summary["duration_by_weeks"].items():
+        lines.append(f"  {n_weeks:3d}: {count}")
+
+    if summary["mean_duration_days"] is not None:
+        lines.append(f"Mean duration: {summary['mean_duration_days']:.1f} days")
+
+    paid = summary["paid"]
+    paid_share = "n/a" if paid["paid_share"] is None else f"{paid['paid_share']:.1%}"
+    lines.append("")
+    lines.append(
+        f"Paid: {paid['paid']}, unpaid: {paid['unpaid']}, unknown: {paid['unknown']} "
+        f"({paid_share} of known are paid)"
+    )
+
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description=(
+            "Summarizes spots, dates, durations and pay over snapshots. Snapshots are "
+            "aggregated once and kept in a state file, so new ones are added without "
+            "reading the old ones again."
+        )
+    )
+
+    parser.add_argument(
+        "snapshots",
+        type=str,
+        nargs="*",
+        help=(
+            "Snapshot folders (e.g. exports/20210521-174435), results.json or "
+            "results.snapshot files."
+        ),
+    )
+
+    parser.add_argument(
+        "--database_path",
+        "-d",
+        type=str,
+        default=None,
+        help="A str representing the path to an SQLite database to add snapshots from.",
+    )
+
+    parser.add_argument(
+        "--state_path",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the saved columns and aggregates. "
+            "Defaults to analytics.npz in the data folder"
+        ),
+    )
+
+    parser.add_argument(
+        "--no_state",
+        action="store_true",
+        help="A flag; if set, no state will be loaded or saved.",
+    )
+
+    parser.add_argument(
+        "--output_format",
+        "-o",
+        type=str,
+        default="text",
+        choices=OUTPUT_FORMATS,
+        help="A str representing the format of the summary.",
+    )
+
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="The number of companies listed in the text summary.",
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    results_paths, database_path, state_path, output_format, n_top = get_arguments(
+        args=args
+    )
+
+    if state_path is not None and os.path.isfile(state_path):
+        analytics = SnapshotAnalytics.load(path=state_path)
+    else:
+        analytics = SnapshotAnalytics()
+
+    n_snapshots = len(analytics.aggregates)
+    n_updated = 0
+    requested_names = list()
+
+    for results_path in results_paths:
+        snapshot_name = get_snapshot_name(results_path=results_path)
+        source = f"file:{get_file_version(path=results_path)}"
+        requested_names.append(snapshot_name)
+
+        if not analytics.is_current(snapshot_name=snapshot_name, source=source):
+            regrouped_results = load_results(path=results_path)
+
+            analytics.add_snapshot(
+                snapshot_name=snapshot_name,
+                regrouped_results=regrouped_results.items(),
+                source=source,
+            )
+            n_updated += 1
+
+    if database_path is not None:
+        connection = sqlite.connect(path=database_path)
+
+        try:
+            versions = sqlite.get_snapshot_versions(connection=connection)
+
+            for snapshot_name, version in versions.items():
+                source = f"sqlite:{version}"
+                requested_names.append(snapshot_name)
+
+                if not analytics.is_current(snapshot_name=snapshot_name, source=source):
+                    analytics.add_snapshot(
+                        snapshot_name=snapshot_name,
+                        regrouped_results=sqlite.load_snapshot(
+                            connection=connection, snapshot_name=snapshot_name
+                        ).items(),
+                        source=source,
+                    )
+                    n_updated += 1
+        finally:
+            connection.close()
+
+    n_added = len(analytics.aggregates) - n_snapshots
+
+    if state_path is not None and n_updated != 0:
+        analytics.save(path=state_path)
+
+    if len(analytics.aggregates) == 0:
+        raise RuntimeError("Couldn't find any snapshots to summarize")
+
+    summary = analytics.summarize(
+        snapshot_names=list(dict.fromkeys(requested_names)) or None
+    )
+
+    if output_format == "json":
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print(
+            f"Added {n_added} new snapshots, updated {n_updated - n_added} changed "
+            "ones\n"
+        )
+        print(format_summary(summary=summary, n_top=n_top))
+
+
+if __name__ == "__main__":
+    main()
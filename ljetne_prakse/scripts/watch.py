@@ -0,0 +1,565 @@
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+from pathlib import Path
+import random
+import sys
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+)
+
+import aiohttp
+import requests
+
+from ljetne_prakse.fetching.asynchronous import create_client, fetch_page
+from ljetne_prakse.fetching.listing import LISTING_FIELDS, load_listing
+from ljetne_prakse.scraping.auth import get_fer_session, is_session_valid
+from ljetne_prakse.scraping.main_page import get_main_page_rows, analyze_main_page_rows
+from ljetne_prakse.scraping.parsing import (
+    DEFAULT_PARSER,
+    PARSERS,
+    check_parser,
+    parse_page,
+)
+from ljetne_prakse.scripts.analyze_position_pages import analyze_position_page
+from ljetne_prakse.scripts.get_pages import get_position_href
+from ljetne_prakse.storage.archive import decode_body
+
+# from ljetne_prakse.utils.paths import DEFAULT_DATA_FOLDER
+
+DEFAULT_DATA_FOLDER = Path(__file__).resolve().parent.parent / "data"
+
+
+class Arguments(NamedTuple):
+    url: str
+    interval: float
+    jitter: float
+    events_path: Optional[Path]
+    listing_path: Optional[Path]
+    fetch_new_pages: bool
+    max_polls: int
+    html_parser: str
+    n_concurrent: int
+    max_retries: int
+    cookies_path: Optional[Path]
+
+
+def get_arguments(args) -> Arguments:
+    url = str(args.url).strip()
+
+    interval = float(args.interval)
+
+    if interval <= 0:
+        raise RuntimeError(f"Expected a positive polling interval, got {interval}")
+
+    jitter = float(args.jitter)
+
+    if not 0 <= jitter < 1:
+        raise RuntimeError(f"Expected a jitter in [0, 1), got {jitter}")
+
+    events_path = None if args.events_path is None else Path(args.events_path)
+    listing_path = None if args.listing_path is None else Path(args.listing_path)
+
+    if listing_path is not None and not listing_path.is_file():
+        raise RuntimeError(f"Couldn't find a main page listing in {listing_path}")
+
+    fetch_new_pages = not bool(args.no_pages)
+
+    max_polls = int(args.max_polls)
+
+    html_parser = str(args.parser).strip()
+    check_parser(parser=html_parser)
+
+    n_concurrent = int(args.n_concurrent)
+
+    if n_concurrent < 1:
+        raise RuntimeError(
+            f"Expected at least 1 concurrent request, got {n_concurrent}"
+        )
+
+    max_retries = int(args.max_retries)
+
+    if args.no_saved_cookies:
+        cookies_path = None
+    elif args.cookies_path is None:
+        cookies_path = DEFAULT_DATA_FOLDER / "session-cookies.json"
+    else:
+        cookies_path = Path(args.cookies_path)
+
+    return Arguments(
+        url=url,
+        interval=interval,
+        jitter=jitter,
+        events_path=events_path,
+        listing_path=listing_path,
+        fetch_new_pages=fetch_new_pages,
+        max_polls=max_polls,
+        html_parser=html_parser,
+        n_concurrent=n_concurrent,
+        max_retries=max_retries,
+        cookies_path=cookies_path,
+    )
+
+
+class EventSink:
+    # Every event is a JSON line, flushed right away so readers see it at once
+    def __init__(self, path: Optional[Path] = None, to_stdout: bool = True):
+        self.to_stdout = to_stdout
+        self._file: Optional[TextIO] = None
+
+        if path is not None:
+            self._file = open(path, mode="a", encoding="utf8")
+
+    def emit(self, event_type: str, **fields):
+        line = json.dumps(
+            {
+                "event": event_type,
+                "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                **fields,
+            },
+            ensure_ascii=False,
+        )
+
+        if self._file is not None:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+        if self.to_stdout:
+            print(line, flush=True)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class MainPagePoller:
+    # Remembers the validators and hash of the last main page, so an unchanged
+    # page costs a 304 or at most a hash instead of a parse
+    def __init__(self, url: str, parser: str = DEFAULT_PARSER):
+        self.url = url
+        self.parser = parser
+
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.sha256: Optional[str] = None
+
+    async def poll(
+        self, client: aiohttp.ClientSession
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        headers = dict()
+
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        async with client.get(self.url, headers=headers) as response:
+            if response.status == 304:
+                return None
+
+            if response.status != 200:
+                raise RuntimeError(f"Main page returned status {response.status}")
+
+            body = await response.read()
+            response_headers = response.headers
+
+        sha256 = hashlib.sha256(body).hexdigest()
+
+        if sha256 == self.sha256:
+            return None
+
+        page_text = decode_body(body=body, headers=response_headers)
+
+        # Parsing takes a while, the event loop keeps serving other tasks
+        listing = await asyncio.get_running_loop().run_in_executor(
+            None, self.get_listing, page_text
+        )
+
+        self.etag = response_headers.get("ETag")
+        self.last_modified = response_headers.get("Last-Modified")
+        self.sha256 = sha256
+
+        return listing
+
+    def get_listing(self, page_text: str) -> Dict[str, Dict[str, Any]]:
+        main_page = parse_page(page_text=page_text, parser=self.parser, only_root=True)
+        main_page_rows = get_main_page_rows(main_page=main_page)
+
+        return {
+            get_position_href(row=row): {
+                field: row.get(field) for field in LISTING_FIELDS
+            }
+            for row in analyze_main_page_rows(main_page_rows=main_page_rows)
+            if row is not None and "url" in row
+        }
+
+
+async def describe_position(
+    client: aiohttp.ClientSession,
+    limiter: asyncio.Semaphore,
+    href: str,
+    parser: str,
+    max_retries: int,
+) -> Optional[Dict[str, Any]]:
+    _, entry = await fetch_page(
+        client=client,
+        limiter=limiter,
+        href=href,
+        destination=None,
+        max_retries=max_retries,
+    )
+
+    if entry is None:
+        return None
+
+    response = entry["response"]
+    page_text = decode_body(body=response["body"], headers=response["headers"])
+
+    # A login page in place of the position page makes the analysis raise, the
+    # event is still worth reporting without details
+    try:
+        position = await asyncio.get_running_loop().run_in_executor(
+            None, analyze_position_page, page_text, href, parser, True
+        )
+    except Exception as e:
+        print(
+            f"WARNING: Couldn't analyze position page `{href}` because of {e!r}",
+            file=sys.stderr,
+        )
+        return None
+
+    return None if position is None else position.to_dict()
+
+
+def renew_session(
+    session: requests.Session, cookies_path: Optional[Path] = None
+) -> Optional[requests.Session]:
+    # Nobody is there to type a password, so a login that would need one raises
+    # and stops watching instead of blocking it. Network errors are only warned
+    # about, the next failed poll tries again
+    try:
+        if is_session_valid(session=session):
+            return None
+
+        print("WARNING: The session expired, logging in again", file=sys.stderr)
+        session, _ = get_fer_session(cookies_path=cookies_path, interactive=False)
+    except requests.RequestException as e:
+        print(f"WARNING: Couldn't renew the session because of {e!r}", file=sys.stderr)
+        return None
+
+    return session
+
+
+async def watch(
+    session,
+    poller: MainPagePoller,
+    sink: EventSink,
+    interval: float,
+    jitter: float = 0.0,
+    known_listing: Optional[Dict[str, Dict[str, Any]]] = None,
+    fetch_new_pages: bool = True,
+    max_polls: int = 0,
+    n_concurrent: int = 4,
+    max_retries: int = 0,
+    cookies_path: Optional[Path] = None,
+):
+    limiter = asyncio.Semaphore(n_concurrent)
+    n_polls = 0
+
+    client = create_client(session=session, n_concurrent=n_concurrent)
+
+    async def renew_client() -> Optional[aiohttp.ClientSession]:
+        nonlocal session, client
+
+        new_session = await asyncio.get_running_loop().run_in_executor(
+            None, renew_session, session, cookies_path
+        )
+
+        if new_session is None:
+            return None
+
+        await client.close()
+        session = new_session
+        client = create_client(session=session, n_concurrent=n_concurrent)
+
+        return client
+
+    try:
+        while max_polls == 0 or n_polls < max_polls:
+            n_polls += 1
+            start_time = time.perf_counter()
+
+            try:
+                listing = await poller.poll(client=client)
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+                print(
+                    f"WARNING: Couldn't poll the main page because of {e}",
+                    file=sys.stderr,
+                )
+                listing = None
+
+                # An expired session usually shows up here first, as a login
+                # page the main page can't be parsed from
+                await renew_client()
+
+            if listing is not None:
+                if known_listing is None:
+                    # Without a listing to start from, the first poll only
+                    # learns what's already posted
+                    sink.emit(event_type="started", n_positions=len(listing))
+                else:
+                    await report_changes(
+                        client=client,
+                        limiter=limiter,
+                        sink=sink,
+                        known_listing=known_listing,
+                        listing=listing,
+                        fetch_new_pages=fetch_new_pages,
+                        parser=poller.parser,
+                        max_retries=max_retries,
+                        renew_client=renew_client,
+                    )
+
+                known_listing = listing
+
+            elapsed = time.perf_counter() - start_time
+
+            if max_polls == 0 or n_polls < max_polls:
+                delay = interval * (1 + random.uniform(-jitter, jitter))
+                await asyncio.sleep(max(0.0, delay - elapsed))
+    finally:
+        await client.close()
+
+
+async def report_changes(
+    client: aiohttp.ClientSession,
+    limiter: asyncio.Semaphore,
+    sink: EventSink,
+    known_listing: Dict[str, Dict[str, Any]],
+    listing: Dict[str, Dict[str, Any]],
+    fetch_new_pages: bool,
+    parser: str,
+    max_retries: int,
+    renew_client: Optional[
+        Callable[[], Awaitable[Optional[aiohttp.ClientSession]]]
+    ] = None,
+):
+    new_urls = [url for url in listing if url not in known_listing]
+    details: List[Optional[Dict[str, Any]]] = [None] * len(new_urls)
+
+    async def describe(indices: List[int]):
+        descriptions = await asyncio.gather(
+            *(
+                describe_position(
+                    client=client,
+                    limiter=limiter,
+                    href=new_urls[i],
+                    parser=parser,
+                    max_retries=max_retries,
+                )
+                for i in indices
+            )
+        )
+
+        for i, description in zip(indices, descriptions):
+            details[i] = description
+
+    if fetch_new_pages and len(new_urls) != 0:
+        await describe(indices=list(range(len(new_urls))))
+
+        failed = [i for i, description in enumerate(details) if description is None]
+
+        # Pages that couldn't be described are tried once more if the session
+        # turns out to have expired
+        if len(failed) != 0 and renew_client is not None:
+            renewed_client = await renew_client()
+
+            if renewed_client is not None:
+                client = renewed_client
+                await describe(indices=failed)
+
+    for url, position in zip(new_urls, details):
+        sink.emit(event_type="new_position", url=url, **listing[url], details=position)
+
+    for url, row in known_listing.items():
+        if url not in listing:
+            sink.emit(event_type="removed_position", url=url, **row)
+        elif any(row.get(field) != listing[url].get(field) for field in LISTING_FIELDS):
+            sink.emit(
+                event_type="changed_position",
+                url=url,
+                **listing[url],
+                previous={field: row.get(field) for field in LISTING_FIELDS},
+            )
+
+
+def main(argv: Optional[List[str]] = None):
+    # region Parsing
+    parser = argparse.ArgumentParser(
+        description=(
+            "Polls the main page and reports new, changed and removed positions as "
+            "JSON lines."
+        )
+    )
+
+    parser.add_argument(
+        "--url",
+        "-u",
+        type=str,
+        default="https://www.fer.unizg.hr/prakse/prijava",
+        help="A str representing the URL of the main practice page.",
+    )
+
+    parser.add_argument(
+        "--interval",
+        "-i",
+        type=float,
+        default=120.0,
+        help="The number of seconds between polls.",
+    )
+
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.1,
+        help="The fraction by which every interval is randomly stretched or shrunk.",
+    )
+
+    parser.add_argument(
+        "--events_path",
+        "-e",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the JSON Lines file events are appended to, next to "
+            "stdout."
+        ),
+    )
+
+    parser.add_argument(
+        "--listing_path",
+        "-l",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the listing.json of a crawled snapshot to compare "
+            "the first poll against. Without it, the first poll only records what's "
+            "posted"
+        ),
+    )
+
+    parser.add_argument(
+        "--no_pages",
+        action="store_true",
+        help="A flag; if set, new position pages won't be fetched and analyzed.",
+    )
+
+    parser.add_argument(
+        "--max_polls",
+        type=int,
+        default=0,
+        help="The number of polls before stopping. 0 is for polling until stopped",
+    )
+
+    parser.add_argument(
+        "--parser",
+        "-p",
+        type=str,
+        default=DEFAULT_PARSER,
+        choices=PARSERS,
+        help="A str representing the BeautifulSoup parser used on fetched pages.",
+    )
+
+    parser.add_argument(
+        "--n_concurrent",
+        "-c",
+        type=int,
+        default=4,
+        help="The number of concurrent requests while fetching new position pages.",
+    )
+
+    parser.add_argument(
+        "--max_retries",
+        type=int,
+        default=3,
+        help="The number of times a throttled or failed position page is retried.",
+    )
+
+    parser.add_argument(
+        "--cookies_path",
+        type=str,
+        default=None,
+        help=(
+            "A str representing the path to the file session cookies are kept in "
+            "between runs. Defaults to session-cookies.json in the data folder"
+        ),
+    )
+
+    parser.add_argument(
+        "--no_saved_cookies",
+        action="store_true",
+        help=(
+            "A flag; if set, saved session cookies won't be used or saved. Once the "
+            "session expires, watching stops unless FERWEB_USERNAME and "
+            "FERWEB_PASSWORD are set."
+        ),
+    )
+
+    args = parser.parse_args(args=argv)
+
+    # endregion
+
+    arguments = get_arguments(args=args)
+
+    session, username = get_fer_session(cookies_path=arguments.cookies_path)
+    print(
+        f"Logged in as {username}, polling {arguments.url} every "
+        f"{arguments.interval:g}s",
+        file=sys.stderr,
+    )
+
+    known_listing = None
+
+    if arguments.listing_path is not None:
+        known_listing = {
+            href: {field: row.get(field) for field in LISTING_FIELDS}
+            for href, row in load_listing(path=arguments.listing_path).items()
+        }
+
+    sink = EventSink(path=arguments.events_path)
+
+    try:
+        asyncio.run(
+            watch(
+                session=session,
+                poller=MainPagePoller(url=arguments.url, parser=arguments.html_parser),
+                sink=sink,
+                interval=arguments.interval,
+                jitter=arguments.jitter,
+                known_listing=known_listing,
+                fetch_new_pages=arguments.fetch_new_pages,
+                max_polls=arguments.max_polls,
+                n_concurrent=arguments.n_concurrent,
+                max_retries=arguments.max_retries,
+                cookies_path=arguments.cookies_path,
+            )
+        )
+    except KeyboardInterrupt:
+        print("Stopped watching", file=sys.stderr)
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import json
+import os
+from pathlib import Path
+import struct
+from typing import Any, Dict, List, Mapping, Optional
+import zlib
+
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Every record is a zlib stream of a big-endian u32 header length, the JSON
+# header (name, URL, status, headers) and the raw body. Records are only
+# ever appended; their offsets live in a JSON Lines index next to the archive.
+HEADER_LENGTH_STRUCT = struct.Struct(">I")
+INDEX_SUFFIX = ".index"
+
+
+def get_index_path(archive_path: Path) -> Path:
+    archive_path = Path(archive_path)
+
+    return archive_path.with_name(archive_path.name + INDEX_SUFFIX)
+
+
+def encode_record(
+    name: str, url: str, status: int, headers: Mapping[str, str], body: bytes
+) -> bytes:
+    header = json.dumps(
+        {"name": name, "url": url, "status": status, "headers": dict(headers)},
+        ensure_ascii=False,
+    ).encode("utf8")
+
+    return zlib.compress(HEADER_LENGTH_STRUCT.pack(len(header)) + header + body)
+
+
+def decode_record(data: bytes) -> Dict[str, Any]:
+    data = zlib.decompress(data)
+
+    (header_length,) = HEADER_LENGTH_STRUCT.unpack_from(data)
+    header_end = HEADER_LENGTH_STRUCT.size + header_length
+
+    record = json.loads(data[HEADER_LENGTH_STRUCT.size : header_end].decode("utf8"))
+    record["body"] = data[header_end:]
+
+    return record
+
+
+def decode_body(
+    body: bytes, headers: Mapping[str, str], encoding: Optional[str] = None
+) -> str:
+    if encoding is None:
+        encoding = get_encoding_from_headers(CaseInsensitiveDict(headers)) or "utf8"
+
+    return body.decode(encoding, errors="replace")
+
+
+class PageArchiveWriter:
+    def __init__(self, path: Path, append: bool = False):
+        self.path = Path(path)
+        self.index_path = get_index_path(self.path)
+
+        self._archive_file = open(self.path, mode="ab" if append else "wb")
+        self._index_file = open(
+            self.index_path, mode="a" if append else "w", encoding="utf8"
+        )
+
+    def append(
+        self,
+        name: str,
+        url: str,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+    ):
+        record = encode_record(
+            name=name, url=url, status=status, headers=headers, body=body
+        )
+        offset = self._archive_file.tell()
+
+        self._archive_file.write(record)
+        self._archive_file.flush()
+
+        # The index line is only written once the record is in the archive, so
+        # a crash can at worst leave unindexed trailing bytes.
+        self._index_file.write(
+            json.dumps(
+                {"name": name, "url": url, "offset": offset, "length": len(record)},
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+        self._index_file.flush()
+
+    def close(self):
+        self._archive_file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PageArchive:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index_path = get_index_path(self.path)
+
+        if not os.path.isfile(self.path) or not os.path.isfile(self.index_path):
+            raise RuntimeError(f"Couldn't find a page archive in {self.path}")
+
+        entries: Dict[str, Dict[str, Any]] = dict()
+
+        # A resumed crawl can archive a page again if it crashed before the
+        # journal recorded it, the last copy of a page is the one kept
+        with open(self.index_path, encoding="utf8") as f:
+            for line in f:
+                line = line.strip()
+
+                if len(line) != 0:
+                    entry = json.loads(line)
+                    entries[entry["name"]] = entry
+
+        self.index: List[Dict[str, Any]] = list(entries.values())
+
+        self._file = open(self.path, mode="rb")
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get_names(self) -> List[str]:
+        return [entry["name"] for entry in self.index]
+
+    def get_record(self, i: int) -> Dict[str, Any]:
+        entry = self.index[i]
+
+        self._file.seek(entry["offset"])
+
+        return decode_record(self._file.read(entry["length"]))
+
+    def get_text(self, i: int, encoding: Optional[str] = None) -> str:
+        record = self.get_record(i)
+
+        return decode_body(
+            body=record["body"], headers=record["headers"], encoding=encoding
+        )
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Dict
+
+from ljetne_prakse.fetching.manifest import link_or_copy
+
+BLOBS_SUFFIX = ".blobs.json"
+
+
+def get_blobs_path(pages_folder: Path) -> Path:
+    pages_folder = Path(pages_folder)
+
+    return pages_folder.with_name(pages_folder.name + BLOBS_SUFFIX)
+
+
+class BlobStore:
+    # Files are kept under their SHA-256 as <root>/<first 2 hex digits>/<digest>,
+    # so a page that didn't change between crawls is only ever written once
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+
+        self.n_written = 0
+        self.n_reused = 0
+
+    def get_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def contains(self, digest: str) -> bool:
+        return os.path.isfile(self.get_path(digest))
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.get_path(digest)
+
+        if os.path.isfile(path):
+            self.n_reused += 1
+            return digest
+
+        if not os.path.exists(path.parent):
+            os.makedirs(path.parent, exist_ok=True)
+
+        # Written to a temporary file first, a blob is either whole or missing
+        descriptor, temporary_path = tempfile.mkstemp(dir=path.parent)
+
+        with os.fdopen(descriptor, mode="wb") as f:
+            f.write(data)
+
+        os.replace(temporary_path, path)
+        self.n_written += 1
+
+        return digest
+
+    def put_file(self, source: Path) -> str:
+        with open(source, mode="rb") as f:
+            data = f.read()
+
+        digest = hashlib.sha256(data).hexdigest()
+
+        # A file that isn't in the store yet becomes the blob itself
+        if not self.contains(digest):
+            if not os.path.exists(self.get_path(digest).parent):
+                os.makedirs(self.get_path(digest).parent, exist_ok=True)
+
+            link_or_copy(source=source, destination=self.get_path(digest))
+            self.n_written += 1
+        else:
+            self.n_reused += 1
+
+        return digest
+
+    def read(self, digest: str) -> bytes:
+        with open(self.get_path(digest), mode="rb") as f:
+            return f.read()
+
+
+class SnapshotBlobs:
+    # Maps the pages of one snapshot to blobs. The pages folder is filled with
+    # hard links to the blobs, so existing tools can keep reading it
+    def __init__(self, store: BlobStore, pages_folder: Path):
+        self.store = store
+        self.pages_folder = Path(pages_folder)
+        self.path = get_blobs_path(self.pages_folder)
+
+        if not os.path.exists(self.pages_folder):
+            os.makedirs(self.pages_folder)
+
+        self.pages: Dict[str, Dict[str, Any]] = load_snapshot_blobs(path=self.path)
+
+    def add_page(self, name: str, url: str, page: bytes):
+        digest = self.store.put(data=page)
+        self._link(name=name, url=url, digest=digest)
+
+    def add_file(self, name: str, url: str, source: Path):
+        digest = self.store.put_file(source=source)
+        self._link(name=name, url=url, digest=digest)
+
+    def _link(self, name: str, url: str, digest: str):
+        source = self.store.get_path(digest)
+        destination = self.pages_folder / name
+
+        if not (os.path.exists(destination) and os.path.samefile(source, destination)):
+            link_or_copy(source=source, destination=destination)
+
+        self.pages[name] = {"url": url, "sha256": digest}
+
+    def get_text(self, name: str) -> str:
+        return self.store.read(self.pages[name]["sha256"]).decode("utf8")
+
+    def save(self):
+        temporary_path = self.path.with_name(self.path.name + ".tmp")
+
+        with open(temporary_path, mode="w+", encoding="utf8") as f:
+            json.dump(self.pages, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+        os.replace(temporary_path, self.path)
+
+
+def load_snapshot_blobs(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not os.path.isfile(path):
+        return dict()
+
+    with open(path, encoding="utf8") as f:
+        return json.load(f)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+from typing import Any, Dict, Optional, Tuple
+
+
+def hash_page(page_text: str) -> str:
+    return hashlib.sha256(page_text.encode("utf8", errors="replace")).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, path: Path, commit_every: int = 256):
+        self.path = Path(path)
+        self.commit_every = commit_every
+
+        self.n_hits = 0
+        self.n_misses = 0
+
+        if not os.path.exists(self.path.parent):
+            os.makedirs(self.path.parent, exist_ok=True)
+
+        self._connection = sqlite3.connect(self.path, timeout=60)
+        self._n_uncommitted = 0
+
+        # WAL lets analysis workers read while the main process writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "page_hash TEXT NOT NULL, "
+            "version TEXT NOT NULL, "
+            "result TEXT NOT NULL, "
+            "PRIMARY KEY (page_hash, version))"
+        )
+        self._connection.commit()
+
+    def get(
+        self, page_hash: str, version: str
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        row = self._connection.execute(
+            "SELECT result FROM analyses WHERE page_hash = ? AND version = ?",
+            (page_hash, version),
+        ).fetchone()
+
+        if row is None:
+            return False, None
+
+        return True, json.loads(row[0])
+
+    def put(self, page_hash: str, version: str, result: Optional[Dict[str, Any]]):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO analyses (page_hash, version, result) "
+            "VALUES (?, ?, ?)",
+            (page_hash, version, json.dumps(result, ensure_ascii=False)),
+        )
+        self._n_uncommitted += 1
+
+        if self._n_uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self._connection.commit()
+        self._n_uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+
+
+def write_record(f: TextIO, record: Dict[str, Any]):
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf8") as f:
+        for line in f:
+            line = line.strip()
+
+            if len(line) != 0:
+                yield json.loads(line)
+
+
+def get_group_offsets(path: Path, key: str) -> Dict[str, List[int]]:
+    # Only line offsets are kept in memory, the records are read back lazily
+    offsets = dict()
+
+    with open(path, mode="rb") as f:
+        offset = f.tell()
+
+        for line in iter(f.readline, b""):
+            if len(line.strip()) != 0:
+                value = json.loads(line)[key]
+
+                if value not in offsets:
+                    offsets[value] = list()
+
+                offsets[value].append(offset)
+
+            offset = f.tell()
+
+    return offsets
+
+
+def iterate_groups(path: Path, key: str) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    offsets = get_group_offsets(path=path, key=key)
+
+    with open(path, mode="rb") as f:
+        for value, group_offsets in offsets.items():
+            records = list()
+
+            for offset in group_offsets:
+                f.seek(offset)
+                record = json.loads(f.readline())
+                del record[key]
+
+                records.append(record)
+
+            yield value, records
+
+
+def dump_groups(groups: Iterable[Tuple[str, List[Dict[str, Any]]]], f: TextIO):
+    # Writes the same text as json.dump(dict(groups), f, ensure_ascii=False,
+    # indent=2) while holding only one group in memory at a time
+    is_first = True
+
+    for value, records in groups:
+        text = json.dumps({value: records}, ensure_ascii=False, indent=2)
+
+        f.write("{\n" if is_first else ",\n")
+        f.write(text[2:-2])
+
+        is_first = False
+
+    f.write("{}" if is_first else "\n}")
@@ -0,0 +1,113 @@
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+import regex
+import unidecode
+
+TOKEN_PATTERN = r"\w+"
+
+TOKEN_REGEX = regex.compile(TOKEN_PATTERN)
+
+# Title matches are worth more than matches in the longer fields
+COLUMN_WEIGHTS = (10.0, 1.0, 4.0)
+
+
+def normalize_for_search(text: Optional[str]) -> str:
+    # unidecode also folds letters like đ that Unicode doesn't decompose
+    if text is None:
+        return ""
+
+    return unidecode.unidecode(text).lower()
+
+
+def remove_snapshot_from_index(connection: sqlite3.Connection, snapshot_id: int):
+    connection.execute(
+        "DELETE FROM positions_search WHERE rowid IN "
+        "(SELECT id FROM positions WHERE snapshot_id = ?)",
+        (snapshot_id,),
+    )
+
+
+def add_snapshot_to_index(connection: sqlite3.Connection, snapshot_id: int):
+    rows = connection.execute(
+        "SELECT id, title, description, competences FROM positions "
+        "WHERE snapshot_id = ?",
+        (snapshot_id,),
+    )
+
+    connection.executemany(
+        "INSERT INTO positions_search (rowid, title, description, competences) "
+        "VALUES (?, ?, ?, ?)",
+        [
+            (
+                position_id,
+                normalize_for_search(title),
+                normalize_for_search(description),
+                normalize_for_search(competences),
+            )
+            for position_id, title, description, competences in rows
+        ],
+    )
+
+
+def build_match_query(query: str) -> str:
+    tokens = TOKEN_REGEX.findall(normalize_for_search(query))
+
+    if len(tokens) == 0:
+        raise RuntimeError(f"Couldn't find any searchable words in `{query}`")
+
+    # Every word has to appear, each one as a prefix so "embed" finds "embedded"
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_positions(
+    connection: sqlite3.Connection,
+    query: str,
+    limit: int = 20,
+    snapshot_name: Optional[str] = None,
+    raw: bool = False,
+) -> List[Dict[str, Any]]:
+    match_query = query if raw else build_match_query(query=query)
+    weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+
+    sql = (
+        f"SELECT bm25(positions_search, {weights}) AS score, s.name, c.name, "
+        "c.url, p.title, p.n_spots, p.planned_start, p.planned_end "
+        "FROM positions_search "
+        "JOIN positions p ON p.id = positions_search.rowid "
+        "JOIN snapshots s ON s.id = p.snapshot_id "
+        "JOIN companies c ON c.id = p.company_id "
+        "WHERE positions_search MATCH ?"
+    )
+    parameters = [match_query]
+
+    if snapshot_name is not None:
+        sql += " AND s.name = ?"
+        parameters.append(snapshot_name)
+
+    sql += " ORDER BY score LIMIT ?"
+    parameters.append(limit)
+
+    return [
+        {
+            # bm25 is lower for better matches, flip it so higher is better
+            "score": -score,
+            "snapshot": snapshot,
+            "company_name": company_name,
+            "company_url": company_url,
+            "position_title": title,
+            "n_spots": n_spots,
+            "planned_start": planned_start,
+            "planned_end": planned_end,
+        }
+        for (
+            score,
+            snapshot,
+            company_name,
+            company_url,
+            title,
+            n_spots,
+            planned_start,
+            planned_end,
+        ) in connection.execute(sql, parameters)
+    ]
@@ -0,0 +1,145 @@
+import json
+import mmap
+import os
+from pathlib import Path
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import zlib
+
+# A snapshot file starts with MAGIC and a format version, followed by one zlib
+# compressed JSON list of positions per company. The company index (name,
+# offset, length and number of positions) comes last, so companies can be
+# written as they are grouped, and the file ends with a fixed-size trailer
+# pointing to the index. Reading a company only decompresses its own bytes.
+MAGIC = b"LJPS"
+FORMAT_VERSION = 1
+HEADER_STRUCT = struct.Struct(">4sH")
+TRAILER_STRUCT = struct.Struct(">QI4s")
+
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+def encode_positions(results: List[Dict[str, Any]]) -> bytes:
+    text = json.dumps(results, ensure_ascii=False, separators=(",", ":"))
+
+    return zlib.compress(text.encode("utf8"))
+
+
+def decode_positions(data: bytes) -> List[Dict[str, Any]]:
+    return json.loads(zlib.decompress(data).decode("utf8"))
+
+
+def write_snapshot(
+    regrouped_results: Iterable[Tuple[str, List[Dict[str, Any]]]], path: Path
+) -> int:
+    path = Path(path)
+    temporary_path = path.with_name(path.name + ".tmp")
+    index = list()
+
+    with open(temporary_path, mode="wb") as f:
+        f.write(HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION))
+
+        for company_name, results in regrouped_results:
+            data = encode_positions(results=results)
+            index.append([company_name, f.tell(), len(data), len(results)])
+            f.write(data)
+
+        index_offset = f.tell()
+        index_data = json.dumps(index, ensure_ascii=False).encode("utf8")
+
+        f.write(index_data)
+        f.write(TRAILER_STRUCT.pack(index_offset, len(index_data), MAGIC))
+
+    os.replace(temporary_path, path)
+
+    return len(index)
+
+
+def is_snapshot_file(path: Path) -> bool:
+    with open(path, mode="rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class SnapshotReader:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+        self._file = open(self.path, mode="rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version = HEADER_STRUCT.unpack_from(self._map, 0)
+
+        if magic != MAGIC:
+            self.close()
+            raise RuntimeError(f"{self.path} isn't a snapshot file")
+
+        if version != FORMAT_VERSION:
+            self.close()
+            raise RuntimeError(
+                f"{self.path} has snapshot format version {version}, expected "
+                f"{FORMAT_VERSION}"
+            )
+
+        index_offset, index_length, magic = TRAILER_STRUCT.unpack_from(
+            self._map, len(self._map) - TRAILER_STRUCT.size
+        )
+
+        if magic != MAGIC:
+            self.close()
+            raise RuntimeError(f"{self.path} is truncated")
+
+        index = json.loads(
+            self._map[index_offset : index_offset + index_length].decode("utf8")
+        )
+
+        self.index: Dict[str, Tuple[int, int, int]] = {
+            company_name: (offset, length, n_positions)
+            for company_name, offset, length, n_positions in index
+        }
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, company_name: str) -> bool:
+        return company_name in self.index
+
+    def get_company_names(self) -> List[str]:
+        return list(self.index)
+
+    def get_n_positions(self, company_name: str) -> int:
+        return self.index[company_name][2]
+
+    def get_positions(self, company_name: str) -> List[Dict[str, Any]]:
+        offset, length, _ = self.index[company_name]
+
+        return decode_positions(self._map[offset : offset + length])
+
+    def items(self) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        for company_name in self.index:
+            yield company_name, self.get_positions(company_name=company_name)
+
+    def to_dict(self) -> Dict[str, List[Dict[str, Any]]]:
+        return dict(self.items())
+
+    def close(self):
+        if not self._map.closed:
+            self._map.close()
+
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def load_results(path: Path) -> Dict[str, List[Dict[str, Any]]]:
+    # Reads results.json and snapshot files alike, so tools don't care which
+    # one they were given
+    if is_snapshot_file(path=path):
+        with SnapshotReader(path=path) as reader:
+            return reader.to_dict()
+
+    with open(path, encoding="utf8") as f:
+        return json.load(f)
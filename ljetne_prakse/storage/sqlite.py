@@ -0,0 +1,258 @@
+import json
+import os
+from pathlib import Path
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ljetne_prakse.storage.search import (
+    add_snapshot_to_index,
+    remove_snapshot_from_index,
+)
+from ljetne_prakse.storage.snapshot import load_results
+from ljetne_prakse.utils.time import get_timestamp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    imported_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS companies (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    url TEXT,
+    description TEXT
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS companies_identity ON companies (
+    name, IFNULL(url, ''), IFNULL(description, '')
+);
+
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY,
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    company_id INTEGER NOT NULL REFERENCES companies (id),
+    n_spots TEXT,
+    title TEXT,
+    description TEXT,
+    competences TEXT,
+    planned_start TEXT,
+    planned_end TEXT,
+    compensation TEXT,
+    location TEXT,
+    -- The schema overflow map as JSON
+    other_fields TEXT,
+    -- The keys the record had, in order, so missing fields stay missing
+    record_keys TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS positions_snapshot ON positions (snapshot_id);
+CREATE INDEX IF NOT EXISTS positions_company ON positions (company_id);
+
+-- Rows share their rowid with positions, kept up to date on export
+CREATE VIRTUAL TABLE IF NOT EXISTS positions_search USING fts5 (
+    title,
+    description,
+    competences,
+    tokenize = 'unicode61'
+);
+"""
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path = Path(path)
+
+    if not os.path.exists(path.parent):
+        os.makedirs(path.parent, exist_ok=True)
+
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+
+    return connection
+
+
+def date_to_text(date: Optional[Sequence[int]]) -> Optional[str]:
+    if date is None:
+        return None
+
+    year, month, day = date
+
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def text_to_date(text: Optional[str]) -> Optional[List[int]]:
+    if text is None:
+        return None
+
+    return [int(x) for x in text.split("-")]
+
+
+def get_company_ids(
+    connection: sqlite3.Connection, companies: Iterable[Tuple[str, Any, Any]]
+) -> Dict[Tuple[str, Any, Any], int]:
+    company_ids = dict()
+
+    for company in companies:
+        if company in company_ids:
+            continue
+
+        connection.execute(
+            "INSERT OR IGNORE INTO companies (name, url, description) VALUES (?, ?, ?)",
+            company,
+        )
+        (company_ids[company],) = connection.execute(
+            "SELECT id FROM companies WHERE name = ? AND IFNULL(url, '') = "
+            "IFNULL(?, '') AND IFNULL(description, '') = IFNULL(?, '')",
+            company,
+        ).fetchone()
+
+    return company_ids
+
+
+def export_snapshot(
+    connection: sqlite3.Connection,
+    snapshot_name: str,
+    regrouped_results: Iterable[Tuple[str, List[Dict[str, Any]]]],
+) -> int:
+    rows = list()
+
+    for company_name, results in regrouped_results:
+        for result in results:
+            company = (
+                company_name,
+                result.get("company_url"),
+                result.get("company_desc"),
+            )
+
+            rows.append(
+                (
+                    company,
+                    result.get("n_spots"),
+                    result.get("position_title"),
+                    result.get("position_desc"),
+                    result.get("competences"),
+                    date_to_text(result.get("planned_start")),
+                    date_to_text(result.get("planned_end")),
+                    result.get("compensation"),
+                    result.get("location"),
+                    (
+                        None
+                        if result.get("other_fields") is None
+                        else json.dumps(result["other_fields"], ensure_ascii=False)
+                    ),
+                    json.dumps(list(result), ensure_ascii=False),
+                )
+            )
+
+    # Re-exporting a snapshot replaces it, everything happens in one transaction
+    with connection:
+        for (old_snapshot_id,) in connection.execute(
+            "SELECT id FROM snapshots WHERE name = ?", (snapshot_name,)
+        ).fetchall():
+            remove_snapshot_from_index(
+                connection=connection, snapshot_id=old_snapshot_id
+            )
+
+        connection.execute("DELETE FROM snapshots WHERE name = ?", (snapshot_name,))
+        snapshot_id = connection.execute(
+            "INSERT INTO snapshots (name, imported_at) VALUES (?, ?)",
+            (snapshot_name, get_timestamp()),
+        ).lastrowid
+
+        company_ids = get_company_ids(
+            connection=connection, companies=(row[0] for row in rows)
+        )
+
+        connection.executemany(
+            "INSERT INTO positions (snapshot_id, company_id, n_spots, title, "
+            "description, competences, planned_start, planned_end, compensation, "
+            "location, other_fields, record_keys) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(snapshot_id, company_ids[row[0]], *row[1:]) for row in rows],
+        )
+
+        add_snapshot_to_index(connection=connection, snapshot_id=snapshot_id)
+
+    return len(rows)
+
+
+def import_results_file(
+    connection: sqlite3.Connection,
+    path: Path,
+    snapshot_name: Optional[str] = None,
+) -> int:
+    path = Path(path)
+
+    # exports/<snapshot>/analysis/results.json
+    if snapshot_name is None:
+        snapshot_name = path.parent.parent.name
+
+    regrouped_results = load_results(path=path)
+
+    return export_snapshot(
+        connection=connection,
+        snapshot_name=snapshot_name,
+        regrouped_results=regrouped_results.items(),
+    )
+
+
+def get_snapshot_names(connection: sqlite3.Connection) -> List[str]:
+    return [
+        name
+        for (name,) in connection.execute("SELECT name FROM snapshots ORDER BY name")
+    ]
+
+
+def get_snapshot_versions(connection: sqlite3.Connection) -> Dict[str, str]:
+    # Re-exporting a snapshot gives it a new row, so this changes with its contents
+    return {
+        name: f"{snapshot_id}:{imported_at}"
+        for snapshot_id, name, imported_at in connection.execute(
+            "SELECT id, name, imported_at FROM snapshots ORDER BY name"
+        )
+    }
+
+
+def load_snapshot(
+    connection: sqlite3.Connection, snapshot_name: str
+) -> Dict[str, List[Dict[str, Any]]]:
+    rows = connection.execute(
+        "SELECT c.name, c.url, c.description, p.n_spots, p.title, p.description, "
+        "p.competences, p.planned_start, p.planned_end, p.compensation, p.location, "
+        "p.other_fields, p.record_keys "
+        "FROM positions p "
+        "JOIN snapshots s ON s.id = p.snapshot_id "
+        "JOIN companies c ON c.id = p.company_id "
+        "WHERE s.name = ? ORDER BY p.id",
+        (snapshot_name,),
+    )
+
+    regrouped_results = dict()
+
+    for row in rows:
+        company_name = row[0]
+
+        if company_name not in regrouped_results:
+            regrouped_results[company_name] = list()
+
+        record = {
+            "company_url": row[1],
+            "company_desc": row[2],
+            "n_spots": row[3],
+            "position_title": row[4],
+            "position_desc": row[5],
+            "competences": row[6],
+            "planned_start": text_to_date(row[7]),
+            "planned_end": text_to_date(row[8]),
+            "compensation": row[9],
+            "location": row[10],
+            "other_fields": None if row[11] is None else json.loads(row[11]),
+        }
+
+        regrouped_results[company_name].append(
+            {key: record[key] for key in json.loads(row[12]) if key in record}
+        )
+
+    return regrouped_results
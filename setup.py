@@ -42,12 +42,20 @@ setup(
         )
     ),
     install_requires=[
+        "aiohttp",
         "beautifulsoup4",
         "html2markdown",
+        "numpy",
         "requests",
         "tqdm",
         "unidecode",
     ],
+    extras_require={
+        "lxml": ["lxml"],
+    },
+    entry_points={
+        "console_scripts": ["ljetne-prakse=ljetne_prakse.cli:main"],
+    },
     python_requires=">=3.8",
     package_data={
         "demonstration": ["demo/*"],
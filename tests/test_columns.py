@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+
+from ljetne_prakse.analysis.columns import (
+    PAID,
+    UNKNOWN_PAY,
+    UNPAID,
+    classify_compensation,
+)
+from ljetne_prakse.storage.snapshot import load_results
+
+EXPORTS_FOLDER = Path(__file__).resolve().parent.parent / "exports"
+
+
+def get_exported_compensations():
+    compensations = set()
+
+    for results_path in sorted(EXPORTS_FOLDER.glob("*/analysis/results.json")):
+        for results in load_results(path=results_path).values():
+            for result in results:
+                compensations.add(result.get("compensation"))
+
+    return compensations
+
+
+EXPORTED_COMPENSATIONS = get_exported_compensations()
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Da", PAID),
+        ("Ne.", UNPAID),
+        ("Nema", UNPAID),
+        ("Praksa se ne honorira", UNPAID),
+        ("Praksa se ne plaća. Osiguran je ručak iz restorana svaki radni dan.", UNPAID),
+        (
+            "Trenutno ne, ali smo u procesu osiguravanja sredstava za honoriranje do "
+            "početka prakse.",
+            UNPAID,
+        ),
+        ("Plaćen topli obrok", UNKNOWN_PAY),
+        ("plaćen topli obrok", UNKNOWN_PAY),
+        ("Pokriveni troškovi ručka", UNKNOWN_PAY),
+        ("Prema dogovoru.", UNKNOWN_PAY),
+        ("", UNKNOWN_PAY),
+        ("Da i plaćen ručak", PAID),
+        ("praksa se honorira prema odrađenim satima plaćen topli obrok", PAID),
+        ("35 HRK/sat + plaćeni troškovi prijevoza", PAID),
+        ("35 kn/h ili po dogovoru", PAID),
+        ("Ljetnu praksu ćemo ti platiti prema odrađenim satima.", PAID),
+        ("Visina honorara određena je doprinosom i rezultatom.", PAID),
+        ("Hourly", PAID),
+    ],
+)
+def test_classify_exported_compensation(text, expected):
+    assert text in EXPORTED_COMPENSATIONS
+    assert classify_compensation(text) == expected
+
+
+def test_not_planned_compensation_is_unpaid():
+    not_planned = [
+        text
+        for text in EXPORTED_COMPENSATIONS
+        if text is not None and text.startswith("Nije predviđeno")
+    ]
+
+    assert len(not_planned) != 0
+    assert all(classify_compensation(text) == UNPAID for text in not_planned)
@@ -0,0 +1,29 @@
+from ljetne_prakse.analysis.companies import CompanyResolver
+
+
+def test_shared_host_does_not_merge_different_names():
+    resolver = CompanyResolver()
+
+    operator_id = resolver.resolve(
+        name="HEP-Operator distribucijskog sustava d.o.o. [x] link",
+        url="http://www.hep.hr",
+    )
+    production_id = resolver.resolve(
+        name="HEP-Proizvodnja d.o.o. [x] link", url="www.hep.hr"
+    )
+
+    assert operator_id != production_id
+
+
+def test_shared_host_keeps_drifted_name():
+    resolver = CompanyResolver()
+
+    first_id = resolver.resolve(
+        name="HEP-Operator distribucijskog sustava d.o.o. [x] link",
+        url="http://www.hep.hr",
+    )
+    second_id = resolver.resolve(
+        name="HEP Operator distribucijskog sustava [x] link", url="https://hep.hr/"
+    )
+
+    assert first_id == second_id
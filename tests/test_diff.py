@@ -0,0 +1,48 @@
+from ljetne_prakse.analysis.diff import diff_records
+from ljetne_prakse.scripts.diff_snapshots import MAX_VALUE_LENGTH, format_change
+
+OLD_RECORDS = [
+    {"company_name": "ALTPRO", "position_title": "Programer", "n_spots": "2"},
+    {"company_name": "ECCOS", "position_title": "Analitičar", "n_spots": "1"},
+    {"company_name": "HEP", "position_title": "Inženjer", "n_spots": "3"},
+]
+NEW_RECORDS = [
+    {"company_name": "HEP", "position_title": "Inženjer", "n_spots": "3"},
+    {"company_name": "ECCOS", "position_title": " analitičar ", "n_spots": "5"},
+    {"company_name": "Span", "position_title": "Tester", "n_spots": "1"},
+]
+
+
+def test_diff_records():
+    diff = diff_records(old_records=OLD_RECORDS, new_records=NEW_RECORDS)
+
+    assert diff["added"] == [NEW_RECORDS[2]]
+    assert diff["removed"] == [OLD_RECORDS[0]]
+    assert diff["n_unchanged"] == 1
+    assert diff["changed"] == [
+        {
+            "company_name": "ECCOS",
+            "position_title": " analitičar ",
+            "changes": {
+                "position_title": ("Analitičar", " analitičar "),
+                "n_spots": ("1", "5"),
+            },
+        }
+    ]
+
+
+def test_format_change_shows_first_difference():
+    prefix = "ECCOS je vodeća hrvatska kompanija u razvoju aplikativnih rješenja. " * 3
+    old_text, new_text = format_change(
+        old_value=prefix + "Zapošljavamo preko 140 djelatnika.",
+        new_value=prefix + "Drugi bitan segment je razvoj SmartCity rješenja.",
+    )
+
+    assert old_text != new_text
+    assert "Zapošljavamo" in old_text
+    assert "Drugi bitan" in new_text
+    assert len(old_text) <= MAX_VALUE_LENGTH and len(new_text) <= MAX_VALUE_LENGTH
+
+
+def test_format_change_keeps_short_values():
+    assert format_change(old_value="2", new_value="5") == ('"2"', '"5"')
@@ -0,0 +1,61 @@
+import io
+import json
+
+from ljetne_prakse.storage.jsonl import dump_groups, iterate_groups, write_record
+
+RECORDS = [
+    {"company_name": "ALTPRO", "position_title": "Programer", "n_spots": "2"},
+    {"company_name": "Čakovec d.o.o.", "position_title": "Analitičar", "n_spots": None},
+    {
+        "company_name": "ALTPRO",
+        "position_title": "Tester",
+        "planned_start": [2021, 6, 7],
+    },
+]
+
+
+def dump_text(groups) -> str:
+    f = io.StringIO()
+    dump_groups(groups=groups, f=f)
+
+    return f.getvalue()
+
+
+def json_dump_text(groups) -> str:
+    f = io.StringIO()
+    json.dump(dict(groups), f, ensure_ascii=False, indent=2)
+
+    return f.getvalue()
+
+
+def test_iterate_groups_keeps_first_seen_order(tmp_path):
+    path = tmp_path / "results.jsonl"
+
+    with open(path, mode="w+", encoding="utf8") as f:
+        for record in RECORDS:
+            write_record(f=f, record=record)
+
+    groups = list(iterate_groups(path=path, key="company_name"))
+
+    assert [name for name, _ in groups] == ["ALTPRO", "Čakovec d.o.o."]
+    assert groups[0][1] == [
+        {"position_title": "Programer", "n_spots": "2"},
+        {"position_title": "Tester", "planned_start": [2021, 6, 7]},
+    ]
+
+
+def test_dump_groups_matches_json_dump(tmp_path):
+    path = tmp_path / "results.jsonl"
+
+    with open(path, mode="w+", encoding="utf8") as f:
+        for record in RECORDS:
+            write_record(f=f, record=record)
+
+    groups = list(iterate_groups(path=path, key="company_name"))
+
+    assert dump_text(groups=groups) == json_dump_text(groups=groups)
+
+
+def test_dump_groups_matches_json_dump_edge_cases():
+    for groups in ([], [("Prazno", [])], [("A", [{}]), ("B", [{"x": {"y": []}}])]):
+        assert dump_text(groups=groups) == json_dump_text(groups=groups)
@@ -0,0 +1,50 @@
+from ljetne_prakse.fetching.rate_limit import AIMDController
+
+
+def test_limit_grows_by_about_one_per_window():
+    controller = AIMDController(initial_limit=4, max_limit=32)
+
+    for _ in range(4):
+        controller.on_success(latency=0.1)
+
+    assert 4.9 < controller.limit < 5.0
+    assert controller.n_allowed == 4
+
+
+def test_limit_stays_within_bounds():
+    controller = AIMDController(initial_limit=2, min_limit=1, max_limit=3)
+
+    for _ in range(100):
+        controller.on_success(latency=0.1)
+
+    assert controller.limit == 3
+
+    controller = AIMDController(initial_limit=2, min_limit=1, max_limit=3)
+
+    # Without a latency estimate every congestion signal backs off
+    for _ in range(10):
+        controller.on_congestion()
+
+    assert controller.limit == 1
+    assert controller.n_allowed == 1
+
+
+def test_congestion_halves_once_per_round_trip():
+    controller = AIMDController(initial_limit=16)
+    controller.on_success(latency=10.0)
+    limit = controller.limit
+
+    controller.on_congestion()
+    controller.on_congestion()
+
+    assert controller.limit == limit * 0.5
+
+
+def test_latency_increase_counts_as_congestion():
+    controller = AIMDController(initial_limit=8, latency_tolerance=2.0, smoothing=1.0)
+    controller.on_success(latency=0.1)
+    limit = controller.limit
+
+    controller.on_success(latency=1.0)
+
+    assert controller.limit == limit * 0.5
@@ -0,0 +1,71 @@
+import json
+
+from ljetne_prakse.storage.archive import PageArchive, PageArchiveWriter
+from ljetne_prakse.storage.snapshot import (
+    SnapshotReader,
+    is_snapshot_file,
+    load_results,
+    write_snapshot,
+)
+
+REGROUPED_RESULTS = {
+    "ALTPRO d.o.o. [x] link": [
+        {"position_title": "Embedded C/C++ programer", "planned_start": [2021, 6, 7]},
+        {"position_title": "Web developer", "compensation": "35 kn/h"},
+    ],
+    "Čakovečki mlinovi d.d. [x] link": [
+        {"position_title": "Analitičar", "other_fields": {"napomena": "Ljeto"}},
+    ],
+}
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "results.snapshot"
+
+    n_companies = write_snapshot(regrouped_results=REGROUPED_RESULTS.items(), path=path)
+
+    assert n_companies == len(REGROUPED_RESULTS)
+    assert is_snapshot_file(path=path)
+    assert load_results(path=path) == REGROUPED_RESULTS
+
+
+def test_snapshot_reads_one_company(tmp_path):
+    path = tmp_path / "results.snapshot"
+    write_snapshot(regrouped_results=REGROUPED_RESULTS.items(), path=path)
+
+    with SnapshotReader(path=path) as reader:
+        assert reader.get_company_names() == list(REGROUPED_RESULTS)
+        assert reader.get_n_positions(company_name="ALTPRO d.o.o. [x] link") == 2
+        assert (
+            reader.get_positions(company_name="Čakovečki mlinovi d.d. [x] link")
+            == REGROUPED_RESULTS["Čakovečki mlinovi d.d. [x] link"]
+        )
+
+
+def test_load_results_reads_json(tmp_path):
+    path = tmp_path / "results.json"
+
+    with open(path, mode="w+", encoding="utf8") as f:
+        json.dump(REGROUPED_RESULTS, f, ensure_ascii=False, indent=2)
+
+    assert not is_snapshot_file(path=path)
+    assert load_results(path=path) == REGROUPED_RESULTS
+
+
+def test_archive_keeps_last_copy_of_page(tmp_path):
+    path = tmp_path / "position-pages.archive"
+
+    with PageArchiveWriter(path=path) as writer:
+        writer.append(name="page-0.html", url="/0", status=200, headers={}, body=b"a")
+        writer.append(name="page-1.html", url="/1", status=200, headers={}, body=b"b")
+
+    # A resumed crawl that crashed before the journal caught up
+    with PageArchiveWriter(path=path, append=True) as writer:
+        writer.append(name="page-0.html", url="/0", status=200, headers={}, body=b"c")
+
+    with PageArchive(path=path) as archive:
+        assert archive.get_names() == ["page-0.html", "page-1.html"]
+        assert [archive.get_record(i)["body"] for i in range(len(archive))] == [
+            b"c",
+            b"b",
+        ]
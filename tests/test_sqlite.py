@@ -0,0 +1,111 @@
+import json
+
+from ljetne_prakse.storage import sqlite
+from ljetne_prakse.storage.search import search_positions
+
+REGROUPED_RESULTS = {
+    "Pulsar Laboratories d.o.o. [x] link": [
+        {
+            "company_url": "https://pulsar.hr",
+            "company_desc": "Razvoj ugradbenih sustava",
+            "n_spots": "2",
+            "position_title": "Embedded C developer",
+            "position_desc": "Razvoj firmvera za mikrokontrolere",
+            "competences": "C, Git",
+            "planned_start": [2021, 7, 1],
+            "planned_end": [2021, 8, 31],
+            "compensation": "Da",
+            "location": "Zagreb",
+            "other_fields": {"napomena": "Rad od kuće"},
+        },
+    ],
+    "Đurđa d.o.o. [x] link": [
+        {
+            "company_url": None,
+            "n_spots": "1",
+            "position_title": "Programer",
+            "compensation": None,
+        },
+    ],
+}
+
+
+def export(path, snapshot_name, regrouped_results):
+    connection = sqlite.connect(path=path)
+
+    try:
+        sqlite.export_snapshot(
+            connection=connection,
+            snapshot_name=snapshot_name,
+            regrouped_results=regrouped_results.items(),
+        )
+    finally:
+        connection.close()
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "ljetne-prakse.sqlite3"
+    export(
+        path=path, snapshot_name="20210521-174435", regrouped_results=REGROUPED_RESULTS
+    )
+
+    connection = sqlite.connect(path=path)
+
+    try:
+        regrouped_results = sqlite.load_snapshot(
+            connection=connection, snapshot_name="20210521-174435"
+        )
+    finally:
+        connection.close()
+
+    # Missing fields stay missing and the key order is kept
+    assert json.dumps(regrouped_results, ensure_ascii=False) == json.dumps(
+        REGROUPED_RESULTS, ensure_ascii=False
+    )
+
+
+def test_export_replaces_snapshot(tmp_path):
+    path = tmp_path / "ljetne-prakse.sqlite3"
+    export(
+        path=path, snapshot_name="20210521-174435", regrouped_results=REGROUPED_RESULTS
+    )
+
+    first_company = next(iter(REGROUPED_RESULTS))
+    export(
+        path=path,
+        snapshot_name="20210521-174435",
+        regrouped_results={first_company: REGROUPED_RESULTS[first_company]},
+    )
+
+    connection = sqlite.connect(path=path)
+
+    try:
+        names = sqlite.get_snapshot_names(connection=connection)
+        regrouped_results = sqlite.load_snapshot(
+            connection=connection, snapshot_name="20210521-174435"
+        )
+        (n_indexed,) = connection.execute(
+            "SELECT count(*) FROM positions_search"
+        ).fetchone()
+    finally:
+        connection.close()
+
+    assert names == ["20210521-174435"]
+    assert list(regrouped_results) == [first_company]
+    assert n_indexed == 1
+
+
+def test_search_ignores_accents(tmp_path):
+    path = tmp_path / "ljetne-prakse.sqlite3"
+    export(
+        path=path, snapshot_name="20210521-174435", regrouped_results=REGROUPED_RESULTS
+    )
+
+    connection = sqlite.connect(path=path)
+
+    try:
+        results = search_positions(connection=connection, query="firmver mikro")
+    finally:
+        connection.close()
+
+    assert [result["position_title"] for result in results] == ["Embedded C developer"]